@@ -1,18 +1,33 @@
-print("Importing modules...", end="")
 import os
 import csv
 import time
 from datetime import datetime, timedelta
 import getpass
 import re
+import gc
+import pickle
+import hashlib
+import tempfile
+import subprocess
+import threading
+from collections import deque
+from array import array
+from itertools import repeat, islice
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from colorama import Fore, Style
 
-import pandas as pd
-import numpy as np
-import pydot
+from lazy_import import LazyModule
+import graph_viewer
+# Heavy modules are only imported by the code paths that use them.
+pd = LazyModule("pandas")
+openpyxl = LazyModule("openpyxl")
+np = LazyModule("numpy")
+# Only needed for Parquet/Feather exports.
+pa = LazyModule("pyarrow")
+pa_parquet = LazyModule("pyarrow.parquet")
 
 import platforms                        # local python script w/ reference info.
-print("done")
 
 # dir path where this script is stored
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -20,29 +35,66 @@ IMPORT_DIR = os.path.join(SCRIPT_DIR, "import")
 IMPORT_DIR_REMOTE = os.path.join(SCRIPT_DIR, "import_remote")
 EXPORT_DIR = os.path.join(SCRIPT_DIR, "export")
 TARGET_PARTS_PATH = os.path.join(IMPORT_DIR, "target_parts.txt")
+REPORT_CACHE_DIR = os.path.join(SCRIPT_DIR, "cache", "reports")
+SNAPSHOT_PATH = os.path.join(SCRIPT_DIR, "cache", "snapshot.pkl")
+RENDER_CACHE_DIR = os.path.join(SCRIPT_DIR, "cache", "renders")
 # https://stackoverflow.com/questions/29768937/return-the-file-path-of-the-file-not-the-current-directory
 
 DATETIME_FORMAT = "%Y-%m-%dT%H%M%S"
 DATE_FORMAT = "%Y-%m-%d"
 DATE_FORMAT_SHORT = "%Y%m%d"
 
+# Parsed-report cache settings. Bump REPORT_PARSER_VERSION whenever a
+# parse_*_report() function's output changes so old cache entries are ignored.
+REPORT_PARSER_VERSION = 1
+REPORT_CACHE_MAX_FILES = 1000
+REPORT_CACHE_MAX_BYTES = 512 * 2**20
+# Max total parts held in cached subtrees while building batch union BOMs.
+UNION_CACHE_MAX_PARTS = 5000000
+# Bump when the layout of PartGroup.get_snapshot_data() changes.
+SNAPSHOT_VERSION = 2
+
+# Graphviz layout program used to render TreeGraph exports, and the output
+# formats it's asked for ("dot" writes the graph source w/o running Graphviz).
+GRAPHVIZ_DOT = "dot"
+GRAPH_FORMATS = ["png", "svg", "pdf", "dot", "json", "html"]
+# Formats written straight from graph data (see graph_viewer.py), not Graphviz.
+VIEWER_FORMATS = ["json", "html"]
+# Graphviz program used to render a cached layout as-is (w/ -n2 flag).
+GRAPHVIZ_NEATO = "neato"
+# Graph layout cache settings.
+RENDER_CACHE_MAX_FILES = 1000
+RENDER_CACHE_MAX_BYTES = 256 * 2**20
+
+# Parts-set export formats. Parquet and Feather (Arrow IPC file) are
+# columnar and written in batches of PARTS_EXPORT_BATCH_SIZE rows.
+PARTS_EXPORT_FORMATS = ["csv", "parquet", "feather"]
+PARTS_EXPORT_BATCH_SIZE = 50000
+
+
+def has_obs_prefix(name):
+    """Return True if part name/description has "OBS-" prefix (SAP convention
+    for parts already dispositioned as obsolete).
+    """
+    return bool(name and len(name) > 3 and ("OBS-" in name[:5].upper()
+                                                or "OBS -" in name[:6].upper()))
+
 
 class Part(object):
     """Object to represent a part, assy, or mod, to be used in building BOM
     structure among other Parts.
     Can add other parts to Parents set or mark as orphan.
+    Parents and Children are dicts keyed by P/N. Children is maintained by
+    add_parent() as the reverse index of each child's Parents.
     """
     def __init__(self, part_num, name=""):
         self.part_num = part_num
         self.name = name
-        self.Parents = set()
+        self.Parents = {}
+        self.Children = {}
 
         # Establish if part has "OBS-" prefix in SAP
-        if self.name and len(self.name) > 3 and ("OBS-" in self.name[:5].upper()
-                                           or "OBS -" in self.name[:6].upper()):
-            self.obs_disp = True
-        else:
-            self.obs_disp = False
+        self.obs_disp = has_obs_prefix(self.name)
 
         # Initialize variable indicating if part has any parents
         self.orphan = False
@@ -99,7 +151,7 @@ class Part(object):
             return True
 
         self.can_obs = True
-        for Parent_i in self.Parents:
+        for Parent_i in self.Parents.values():
             # If no parents in set, leaves self.can_obs = True as it should.
             if not silent:
                 print("%s: looking for status of parent %s" % (self.part_num,
@@ -121,46 +173,52 @@ class Part(object):
     def is_orphan(self):
         return self.orphan
 
+    def is_platform(self):
+        return False
+
     def add_parent(self, Parent_i):
-        self.Parents.add(Parent_i)
+        self.Parents[Parent_i.get_pn()] = Parent_i
+        Parent_i.Children[self.part_num] = self
+
+    def remove_parent(self, Parent_i):
+        del self.Parents[Parent_i.get_pn()]
+        del Parent_i.Children[self.part_num]
 
     def get_parent(self, parent_num):
-        for Parent_i in self.Parents:
-            if parent_num == Parent_i.get_pn():
-                return Parent_i
-        return False # only happens if no match found in loop.
+        return self.Parents.get(parent_num, False) # False if no match found.
 
     def get_parents(self):
-        return self.Parents
+        return set(self.Parents.values())
+
+    def get_child(self, child_num):
+        return self.Children.get(child_num, False) # False if no match found.
+
+    def get_children(self):
+        return set(self.Children.values())
 
     def get_parents_above(self, buffer=None, assy_only=False):
         """Returns union of all parents above this part in the hierarchy,
-        recursing up the tree.
+        walking up the tree. Each part's parents are only visited once.
+        PartGroup.get_parents_above() gives the same result from a cache and
+        should be preferred when a group is available.
         """
         if assy_only:
-            parents_set = self.get_parents_above(assy_only=False)
-
-            no_platforms = parents_set - self.get_platform_refs()
-
-            return set({Part_j for Part_j in no_platforms
-                                if not Part_j.get_name().endswith("MOD")
-                               and not Part_j.get_name().endswith("PLATFORM")
-                               and not Part_j.get_pn().endswith("M01")
-                               and not Part_j.get_pn().startswith("U20")
-                               and not "INSTALLATION" in Part_j.get_name()
-                               and not "INSTL" in Part_j.get_name()
-                               and not "INST'L" in Part_j.get_name()    })
+            return filter_assy_parts(self.get_parents_above(assy_only=False))
 
         if buffer == None:
             buffer = set()
             # This is required rather than assigning set() as the default buffer
             # in the formal parameter listing. Causes unwanted behavior.
             # https://nikos7am.com/posts/mutable-default-arguments/
-        for Part_i in self.get_parents():
-            if isinstance(Part_i, Platform):
-                buffer.add(Part_i)
-            else:
-                buffer.update(set({Part_i}), Part_i.get_parents_above(buffer))
+        visit_stack = [self]
+        while visit_stack:
+            Part_i = visit_stack.pop()
+            for Parent_j in Part_i.Parents.values():
+                if Parent_j in buffer:
+                    continue
+                buffer.add(Parent_j)
+                if not isinstance(Parent_j, Platform):
+                    visit_stack.append(Parent_j)
 
         return buffer
 
@@ -196,13 +254,17 @@ class Platform(Part):
         self.part_num = part_num
         self.name = name
         self.can_obs = can_obs
-        self.Parents = set()
+        self.Parents = {}
+        self.Children = {}
         self.orphan = False
         self.report_name = None
 
     def get_obs_status(self, silent=False):
         return self.can_obs
 
+    def is_platform(self):
+        return True
+
     def __str__(self):
         return self.part_num
 
@@ -210,14 +272,985 @@ class Platform(Part):
         return "Platform object: %s" % self.part_num
 
 
+def filter_assy_parts(Parts_set):
+    """Return subset of Parts_set that aren't platforms, mods, or installations.
+    """
+    return set({Part_j for Part_j in Parts_set
+                        if not Part_j.is_platform()
+                       and not Part_j.get_name().endswith("MOD")
+                       and not Part_j.get_name().endswith("PLATFORM")
+                       and not Part_j.get_pn().endswith("M01")
+                       and not Part_j.get_pn().startswith("U20")
+                       and not "INSTALLATION" in Part_j.get_name()
+                       and not "INSTL" in Part_j.get_name()
+                       and not "INST'L" in Part_j.get_name()    })
+
+
+def extract_multilev_bom_edges(import_data, part_num, filename, verbose=False):
+    """Parse a multi-level BOM (CS11 or CS12 export) in DataFrame form.
+    Finds the explosion-level column and passes the needed columns to
+    extract_multilev_bom_arrays().
+    """
+    # Check expected fields are present
+    assert "Component number" in import_data.columns, ("Expected column "
+                                    "called 'Component number' to exist in file. "
+                                    "Check formatting in %s." % filename)
+    assert "Object description" in import_data.columns, ("Expected column "
+                                    "called 'Object description' to exist in file. "
+                                    "Check formatting in %s." % filename)
+    for level_col in ["Explosion level", "Level", "Lv"]:
+        if level_col in import_data.columns:
+            break
+    else:
+        raise Exception("Expected an explosion-level column to exist in file. "
+                                    "Check formatting in %s." % filename)
+
+    if verbose:
+        print(import_data.to_string(max_rows=10, max_cols=7))
+
+    return extract_multilev_bom_arrays(
+                        import_data["Component number"].to_numpy(),
+                        import_data["Object description"].to_numpy(),
+                        import_data[level_col].to_numpy(), part_num, filename,
+                        row_labels=import_data.index.to_numpy(), verbose=verbose)
+
+
+def blank_missing(values):
+    """Return object array of values w/ missing entries (None or NaN) replaced
+    by empty strings.
+    """
+    values = np.asarray(values, dtype=object)
+    # NaN is the only value not equal to itself.
+    return np.where((values == None) | (values != values), "", values)
+
+
+def extract_multilev_bom_arrays(part_nums, part_descs, levels, part_num,
+                                    filename, row_labels=None, verbose=False):
+    """Resolve the parent of every row of a multi-level BOM w/ array operations
+    instead of walking a level stack row by row.
+    Each row's parent is the nearest preceding row at a lower explosion level
+    (or the report part, part_num, for level-1 rows).
+    Levels can be given as numbers or as dotted strings (e.g. "..2").
+    Returns (N, 2) array of (child P/N, parent P/N) pairs and dict of
+    descriptions keyed by P/N (first description found for each P/N).
+    """
+    part_nums = blank_missing(part_nums).astype(str)
+    part_descs = blank_missing(part_descs).astype(str)
+    levels = np.asarray(levels)
+    if row_labels is None:
+        row_labels = np.arange(part_nums.size)
+
+    # Skip "custom options"
+    keep_rows = ~((np.char.str_len(part_nums) < 6)
+                                    & np.char.startswith(part_nums, "CU"))
+    part_nums = part_nums[keep_rows]
+    part_descs = part_descs[keep_rows]
+    levels = levels[keep_rows]
+    row_labels = np.asarray(row_labels)[keep_rows]
+    if not part_nums.size:
+        # Nothing below report part.
+        return np.empty((0, 2), dtype=object), {}
+
+    if levels.dtype.kind in "iuf":
+        levels = levels.astype(int)
+    else:
+        # Explosion level looks like ".1", "..2", etc. Keep number after dots.
+        levels = np.char.rpartition(blank_missing(levels).astype(str),
+                                                            ".")[:, 2].astype(int)
+
+    # Rudimentary data validation
+    bad_rows = np.flatnonzero(np.char.str_len(part_nums) < 5)
+    assert not bad_rows.size, ("Found less than 5 digits where "
+                        "part number should be in row pos %d of report. "
+                        "Check formatting in %s." % (row_labels[bad_rows[0]],
+                                                                    filename))
+    bad_rows = np.flatnonzero(np.char.str_len(part_descs) == 0)
+    assert not bad_rows.size, ("Found empty cell where "
+                        "description string should be in row pos %d. "
+                        "Check formatting in %s." % (row_labels[bad_rows[0]],
+                                                                    filename))
+    bad_rows = np.flatnonzero(levels < 1)
+    assert not bad_rows.size, ("Found explosion level below 1 in row pos %d. "
+                        "Check formatting in %s." % (row_labels[bad_rows[0]],
+                                                                    filename))
+
+    # Prepend a level-0 row standing in for the report part.
+    all_levels = np.concatenate(([0], levels))
+    all_nums = np.concatenate(([part_num], part_nums)).astype(object)
+    positions = np.arange(all_levels.size)
+
+    # latest_pos[k, j] is the position of the most recent row at or before j
+    # whose level is <= k. Built by forward-filling each level's row positions
+    # and then taking the running max across levels.
+    latest_pos = np.where(all_levels == np.arange(all_levels.max()+1)[:, None],
+                                                                positions, -1)
+    np.maximum.accumulate(latest_pos, axis=1, out=latest_pos)
+    np.maximum.accumulate(latest_pos, axis=0, out=latest_pos)
+    # Row at position j looks at rows before it (j-1) for a level below its own.
+    parent_pos = latest_pos[levels-1, positions[:-1]]
+
+    edges = np.column_stack((all_nums[1:], all_nums[parent_pos]))
+
+    first_rows = np.unique(part_nums, return_index=True)[1]
+    descs = dict(zip(part_nums[first_rows].tolist(),
+                                            part_descs[first_rows].tolist()))
+    if verbose:
+        print("%d links found in %s" % (len(edges), filename))
+
+    return edges, descs
+
+
+def extract_multi_w_edges(import_data, part_num, filename, platform_pns,
+                                                                verbose=False):
+    """Parse a multi-level where-used report (CS15 export) in DataFrame form.
+    Checks expected columns are present and passes them to
+    extract_multi_w_arrays().
+    """
+    # Check fields are in expected locations
+    assert "Level" in import_data.columns, ("Expected "
+                                    "'Level' in cell A1. "
+                                    "Check formatting in %s." % filename)
+    assert "Object description" in import_data.columns, ("Expected "
+                                    "'Object description' in cell D1. "
+                                    "Check formatting in %s." % filename)
+    assert "Component number" in import_data.columns, ("Expected "
+                                    "'Component number' in cell E1. "
+                                    "Check formatting in %s." % filename)
+
+    if verbose:
+        print(import_data.to_string(max_rows=10, max_cols=7))
+
+    return extract_multi_w_arrays(import_data["Level"].to_numpy(),
+                        import_data["Component number"].to_numpy(),
+                        import_data["Object description"].to_numpy(),
+                        part_num, filename, platform_pns,
+                        row_labels=import_data.index.to_numpy(), verbose=verbose)
+
+
+def extract_multi_w_arrays(levels, part_nums, part_descs, part_num, filename,
+                                    platform_pns, row_labels=None, verbose=False):
+    """Resolve parent relationships and orphans in a multi-level where-used
+    report w/ array operations.
+    Report rows are split into groups by blank rows. Within a group, each row
+    is a parent of the part found for it by these rules (in order):
+      - level went up from previous row: previous row's part.
+      - level didn't go up, isn't the group's last level, and previous part
+        isn't a platform: same part as previous row. Previous part is an
+        orphan (it had no parents listed).
+      - level above 1: most recent part anywhere above at one level lower.
+      - otherwise: same part as previous row (report part for a group's
+        first row).
+    Anything at a group's last level that isn't a platform is also an orphan.
+    platform_pns is collection of platform P/Ns already in group.
+    Returns (N, 2) array of (child P/N, parent P/N) pairs, dict of
+    descriptions keyed by P/N, and set of orphan P/Ns.
+    """
+    levels = blank_missing(levels)
+    if row_labels is None:
+        row_labels = np.arange(levels.size)
+    row_labels = np.asarray(row_labels)
+
+    # Blank rows divide groups. Number each group by counting blanks above it.
+    blank_rows = (levels == "")
+    group_ids = np.cumsum(blank_rows)[~blank_rows]
+    levels = levels[~blank_rows].astype(int)
+    part_nums = blank_missing(part_nums)[~blank_rows].astype(str)
+    part_descs = blank_missing(part_descs)[~blank_rows].astype(str)
+    row_labels = row_labels[~blank_rows]
+    row_count = levels.size
+    if not row_count:
+        return np.empty((0, 2), dtype=object), {}, set()
+
+    # Rudimentary data validation
+    bad_rows = np.flatnonzero(np.char.str_len(part_nums) < 5)
+    assert not bad_rows.size, ("Found less than 5 digits where "
+                        "part number should be in cell E%d of report. "
+                        "Check formatting in %s." % (row_labels[bad_rows[0]]+2,
+                                                                    filename))
+    bad_rows = np.flatnonzero(np.char.str_len(part_descs) == 0)
+    assert not bad_rows.size, ("Found empty cell where "
+                        "description string should be in cell D%d. "
+                        "Check formatting in %s." % (row_labels[bad_rows[0]]+2,
+                                                                    filename))
+
+    positions = np.arange(row_count)
+    group_start = np.ones(row_count, dtype=bool)
+    group_start[1:] = group_ids[1:] != group_ids[:-1]
+    group_end = np.ones(row_count, dtype=bool)
+    group_end[:-1] = group_start[1:]
+    # Level of last row in each row's group.
+    max_levels = levels[group_end][np.cumsum(group_start) - 1]
+
+    prev_levels = np.concatenate(([0], levels[:-1]))
+    is_platform = np.isin(part_nums, list(platform_pns))
+    prev_platform = np.concatenate(([False], is_platform[:-1]))
+
+    level_up = ~group_start & (levels > prev_levels)
+    same_child = (~group_start & ~level_up & (levels < max_levels)
+                                                            & ~prev_platform)
+    lower_level = ~level_up & ~same_child & (levels > 1)
+
+    # Child position for each row: -1 means report part, -2 means same as
+    # previous row (filled in below).
+    child_pos = np.full(row_count, -2)
+    child_pos[group_start] = -1
+    child_pos[level_up] = positions[level_up] - 1
+    if lower_level.any():
+        # latest_pos[k, j]: position of most recent row at or before j at level k.
+        latest_pos = np.where(levels == np.arange(levels.max()+1)[:, None],
+                                                                positions, -1)
+        np.maximum.accumulate(latest_pos, axis=1, out=latest_pos)
+        lower_rows = np.flatnonzero(lower_level)
+        found_pos = np.full(lower_rows.size, -1)
+        has_prev = lower_rows > 0
+        found_pos[has_prev] = latest_pos[levels[lower_rows[has_prev]]-1,
+                                                    lower_rows[has_prev]-1]
+        assert (found_pos >= 0).all(), ("No part found at level %d above "
+                        "cell E%d. Check formatting in %s."
+                        % (levels[lower_rows[found_pos < 0][0]]-1,
+                            row_labels[lower_rows[found_pos < 0][0]]+2, filename))
+        child_pos[lower_rows] = found_pos
+    # Forward-fill rows that keep previous row's child. First row of every
+    # group is always set above.
+    fill_from = np.maximum.accumulate(np.where(child_pos != -2, positions, 0))
+    child_pos = child_pos[fill_from]
+
+    all_nums = np.concatenate(([part_num], part_nums)).astype(object)
+    edges = np.column_stack((all_nums[child_pos+1], all_nums[1:]))
+
+    orphans = set(part_nums[positions[same_child] - 1].tolist())
+    orphans.update(part_nums[(levels == max_levels) & ~is_platform].tolist())
+
+    first_rows = np.unique(part_nums, return_index=True)[1]
+    descs = dict(zip(part_nums[first_rows].tolist(),
+                                            part_descs[first_rows].tolist()))
+    if verbose:
+        print("%d links and %d orphans found in %s" % (len(edges),
+                                                        len(orphans), filename))
+
+    return edges, descs, orphans
+
+
+# Lines of CS11 text export before column headers, and between headers and
+# data (0-indexed). Last line of file is a footer.
+CS11_HEADER_LINE = 8
+CS11_FIRST_DATA_LINE = 10
+
+
+# Cell text pd.read_excel() treats as missing (NaN) by default.
+# https://pandas.pydata.org/docs/reference/api/pandas.read_excel.html
+EXCEL_NA_STRINGS = frozenset(["", "#N/A", "#N/A N/A", "#NA", "-1.#IND",
+                    "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN", "<NA>",
+                    "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"])
+
+
+def xlsx_cell_str(value):
+    """Convert a cell value read by openpyxl to a string the same way
+    pd.read_excel(dtype=str) does. Returns None for blank or N/A cells.
+    """
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        # Whole numbers read as floats ("200072.0") but shown as ints.
+        value = int(value)
+    value = str(value)
+    if value in EXCEL_NA_STRINGS:
+        return None
+    return value
+
+
+def iter_xlsx_rows(import_path, columns=None):
+    """Generator that streams the first worksheet of an .xlsx file (openpyxl
+    read-only mode, so whole workbook is never loaded), yielding a tuple of
+    cell strings (see xlsx_cell_str()) for each row below the header row.
+    Trailing blank rows are dropped, same as pd.read_excel().
+    columns is a list of header names to include (in that order). An entry
+    can be a tuple of alternative names (first one found is used). Defaults
+    to all columns.
+    """
+    file_name = os.path.basename(import_path)
+    workbook = openpyxl.load_workbook(import_path, read_only=True,
+                                                data_only=True, keep_links=False)
+    # https://openpyxl.readthedocs.io/en/stable/optimized.html
+    try:
+        sheet_rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [xlsx_cell_str(value) for value in next(sheet_rows, ())]
+        if columns is None:
+            col_positions = list(range(len(header)))
+        else:
+            col_positions = []
+            for name in columns:
+                options = name if isinstance(name, tuple) else (name,)
+                found = [option for option in options if option in header]
+                assert found, ("Expected column called '%s' to exist in file. "
+                                    "Check formatting in %s."
+                                        % ("' or '".join(options), file_name))
+                col_positions.append(header.index(found[0]))
+
+        # Hold back blank rows until a non-blank row follows them.
+        blank_rows = []
+        for values in sheet_rows:
+            if not any(value is not None for value in values):
+                blank_rows.append((None,) * len(col_positions))
+                continue
+            yield from blank_rows
+            blank_rows = []
+            # Only needed cells are converted. Missing trailing cells (short
+            # rows) read as blank.
+            yield tuple(xlsx_cell_str(values[pos]) if pos < len(values)
+                                            else None for pos in col_positions)
+    finally:
+        workbook.close()
+
+
+def read_xlsx_columns(import_path, columns):
+    """Stream given columns of an .xlsx file (see iter_xlsx_rows()) into a
+    list of object arrays, one per column.
+    """
+    rows = list(iter_xlsx_rows(import_path, columns))
+    if rows:
+        return [np.array(col_values, dtype=object) for col_values in zip(*rows)]
+    return [np.empty(0, dtype=object) for name in columns]
+
+
+def split_cs11_text_line(line):
+    """Split one line of CS11 text export on pipes and strip each field.
+    """
+    return [field.strip() for field in line.split("|")]
+
+
+def get_cs11_text_columns(import_path):
+    """Return list of column names in a CS11 "Level-by-Level" text export.
+    Blank names (from leading and trailing pipes) are omitted.
+    """
+    # Same encoding pd.read_csv() used (not the locale's).
+    with open(import_path, "r", encoding="utf-8") as text_file:
+        for line_num, line in enumerate(text_file):
+            if line_num == CS11_HEADER_LINE:
+                return [name for name in split_cs11_text_line(line) if name]
+    raise Exception("Can't find column headers in %s"
+                                            % os.path.basename(import_path))
+
+
+def iter_cs11_text_rows(import_path, columns=None):
+    """Generator that streams a CS11 "Level-by-Level" text export
+    (pipe-delimited table w/ a header block and one-line footer), yielding a
+    tuple of stripped field strings for each data row.
+    columns is a list of column names to include (in that order). An entry
+    can be a tuple of alternative names (first one found is used), so columns
+    can be picked in the same pass as the rows are read. Defaults to all named
+    columns.
+    """
+    file_name = os.path.basename(import_path)
+    header = None
+    # Hold each row back one line so the footer (last line) is dropped.
+    pending_row = None
+    with open(import_path, "r", encoding="utf-8") as text_file:
+        for line_num, line in enumerate(text_file):
+            if line_num < CS11_HEADER_LINE:
+                continue
+            elif line_num == CS11_HEADER_LINE:
+                header = split_cs11_text_line(line)
+                if columns is None:
+                    columns = [name for name in header if name]
+                col_positions = []
+                for name in columns:
+                    options = name if isinstance(name, tuple) else (name,)
+                    found = [option for option in options if option in header]
+                    assert found, ("Expected column called '%s' to exist in "
+                                        "file. Check formatting in %s."
+                                        % ("' or '".join(options), file_name))
+                    col_positions.append(header.index(found[0]))
+                continue
+            elif line_num < CS11_FIRST_DATA_LINE or not line.strip():
+                continue
+
+            if pending_row is not None:
+                yield pending_row
+            fields = split_cs11_text_line(line)
+            # Pad short lines so missing trailing fields read as blank.
+            fields.extend([""] * (len(header) - len(fields)))
+            pending_row = tuple(fields[pos] for pos in col_positions)
+
+    if header is None:
+        raise Exception("Can't find column headers in %s" % file_name)
+
+
+def read_cs11_text(import_path, columns=None):
+    """Read a CS11 "Level-by-Level" text export into a DataFrame (all fields
+    as strings), using iter_cs11_text_rows().
+    """
+    if columns is None:
+        columns = get_cs11_text_columns(import_path)
+    return pd.DataFrame.from_records(list(iter_cs11_text_rows(import_path,
+                                            columns)), columns=columns)
+
+
+def extract_cs11_text_edges(import_path, part_num, filename, verbose=False):
+    """Stream the columns needed from a CS11 text export straight into
+    extract_multilev_bom_arrays() (no DataFrame built). File is read once.
+    """
+    rows = list(iter_cs11_text_rows(import_path, ["Component number",
+                    "Object description", ("Explosion level", "Level", "Lv")]))
+    if rows:
+        part_nums, part_descs, levels = map(np.array, zip(*rows))
+    else:
+        part_nums, part_descs, levels = np.empty((3, 0), dtype=str)
+    return extract_multilev_bom_arrays(part_nums, part_descs, levels, part_num,
+                                                    filename, verbose=verbose)
+
+
+def make_parsed_report(report_pn, report_name, edges, descs, orphans=(),
+                                                            report_desc=""):
+    """Bundle one report's parsed contents as plain data (picklable, so it can
+    be passed back from a worker process or cached).
+    """
+    return {"report_pn": report_pn, "report_name": report_name,
+            "report_desc": report_desc, "edges": edges, "descs": descs,
+            "orphans": set(orphans)}
+
+
+def parse_SAPTC_report(import_path, verbose=False, stream_xlsx=False):
+    """Read a single-level where-used report generated by Teamcenter's SAP
+    plugin. If stream_xlsx is True, rows are streamed w/ iter_xlsx_rows()
+    instead of loading workbook w/ pandas.
+    Returns parsed report (see make_parsed_report()), or None if file isn't
+    this type of report.
+    """
+    file_name = os.path.basename(import_path)
+
+    report_prefix = "SAPTC"
+    if not (file_name.startswith(report_prefix)
+                    and os.path.splitext(file_name)[-1].lower()==".xlsx"):
+        # ignore files not matching expected report pattern
+        if verbose:
+            print("Unrecognized report-name format (skipping): %s\n" % file_name)
+        return None
+
+    print("\nReading data from %s..." % file_name)
+    # Cells are accessed by position: report_rows[i][j] is row i+2, column j+1
+    # in spreadsheet (first row is header).
+    if stream_xlsx:
+        report_rows = list(iter_xlsx_rows(import_path))
+    else:
+        excel_data = pd.read_excel(import_path, dtype=str, engine="openpyxl")
+        import_data = pd.DataFrame(excel_data)
+        # https://stackoverflow.com/a/41662442
+        report_rows = import_data.to_numpy(dtype=object).tolist()
+
+    part_num = report_rows[0][2]
+    part_desc = report_rows[1][2]
+
+    # Check fields are in expected locations
+    assert report_rows[0][0] == "Material:", ("Expected "
+                    "'Material:' in cell A2. "
+                    "Check formatting in %s." % file_name)
+    assert report_rows[1][0] == "Description:", ("Expected "
+                    "'Description:' in cell A3. "
+                    "Check formatting in %s." % file_name)
+
+    # Rudimentary data validation
+    assert len(part_num) >= 5, ("Found less than 5 digits "
+                    "where part number should be in cell C2. "
+                    "Check formatting in %s." % file_name)
+    assert len(part_desc) > 0, ("Found empty cell where "
+      "description string should be in cell C3. "
+                    "Check formatting in %s." % file_name)
+
+    # Check table headers are in expected locations
+    assert report_rows[5][3] == "Component", ("Expected "
+                    "'Component' in cell D7. "
+                    "Check formatting in %s." % file_name)
+    assert report_rows[5][4] == "Component Description", (
+        "Expected 'Component Description' in cell D7. "
+            "Check formatting in %s." % file_name)
+
+    # Iterate through the results and associate parent to report part.
+    edges = []
+    descs = {}
+    for idx in range(6, len(report_rows)-1):
+        parent_num = report_rows[idx][3]
+        parent_desc = report_rows[idx][4]
+
+        # Rudimentary data validation
+        assert len(parent_num) >= 5, ("Found less than 5 digits "
+                        "where part number should be in D%d. "
+                        "Check formatting in %s." % (idx+2, file_name))
+        assert len(parent_desc) > 0, ("Found empty cell where "
+                        "description string should be in cell E%d. "
+                        "Check formatting in %s." % (idx+2, file_name))
+
+        descs.setdefault(parent_num, parent_desc)
+        edges.append((part_num, parent_num))
+
+    return make_parsed_report(part_num, file_name, edges, descs,
+                                                        report_desc=part_desc)
+
+
+def parse_SAP_multi_w_report(import_path, platform_pns, verbose=False,
+                                                            stream_xlsx=False):
+    """Read a multi-level where-used report exported from SAP CS15.
+    platform_pns is collection of platform P/Ns (needed for orphan rules).
+    If stream_xlsx is True, only the needed columns are streamed w/
+    iter_xlsx_rows() instead of loading workbook w/ pandas.
+    Returns parsed report (see make_parsed_report()), or None if file isn't
+    this type of report.
+    """
+    file_name = os.path.basename(import_path)
+    report_prefix = "SAP_multi_w"
+    if not (file_name.startswith(report_prefix) and
+                          os.path.splitext(file_name)[-1].lower()==".xlsx"):
+        # ignore files not matching expected report pattern
+        if verbose:
+            print("Unrecognized report-name format (skipping): %s\n" % file_name)
+        return None
+
+    pn_regex = r"(?<=^" + report_prefix + r"_)[\dA-Z]{1,40}(?=_\S*\.XLSX$|\.XLSX$)"
+    pn_matches = re.findall(pn_regex, file_name, flags=re.IGNORECASE)
+    if len(pn_matches) == 1:
+        part_num = pn_matches[0]
+    else:
+        return None
+
+    print("\nReading data from %s..." % file_name)
+    if stream_xlsx:
+        levels, part_nums, part_descs = read_xlsx_columns(import_path,
+                        ["Level", "Component number", "Object description"])
+        edges, descs, orphans = extract_multi_w_arrays(levels, part_nums,
+                part_descs, part_num, file_name, platform_pns, verbose=verbose)
+    else:
+        excel_data = pd.read_excel(import_path, dtype=str, engine="openpyxl")
+        import_data = pd.DataFrame(excel_data)
+        # https://stackoverflow.com/a/41662442
+
+        edges, descs, orphans = extract_multi_w_edges(import_data, part_num,
+                                    file_name, platform_pns, verbose=verbose)
+    return make_parsed_report(part_num, file_name, edges, descs, orphans)
+
+
+def parse_SAP_multi_BOM_report_xlsx(import_path, verbose=False,
+                                                            stream_xlsx=False):
+    """Read a multi-level BOM exported from SAP CS12.
+    If stream_xlsx is True, only the needed columns are streamed w/
+    iter_xlsx_rows() instead of loading workbook w/ pandas.
+    Returns parsed report (see make_parsed_report()), or None if file isn't
+    this type of report.
+    """
+    file_name = os.path.basename(import_path)
+    report_prefix = "SAP_multi_BOM"
+    if not (file_name.startswith(report_prefix)
+                    and os.path.splitext(file_name)[-1].lower()==".xlsx"):
+        # ignore files not matching expected report pattern
+        if verbose:
+            print("Unrecognized report-name format (skipping): %s\n" % file_name)
+        return None
+
+    print("\nReading data from %s..." % file_name)
+    if not stream_xlsx:
+        excel_data = pd.read_excel(import_path, dtype=str, engine="openpyxl")
+        import_df = pd.DataFrame(excel_data)
+        # https://stackoverflow.com/a/41662442
+
+    pn_regex = r"(?<=^" + report_prefix + r"_)[\dA-Z]{1,40}(?=_\S*\.XLSX$|\.XLSX$)"
+    pn_matches = re.findall(pn_regex, file_name, flags=re.IGNORECASE)
+    if len(pn_matches) == 1:
+        pn = pn_matches[0]
+    else:
+        raise Exception("Can't find P/N in filename: %s" % file_name)
+
+    if stream_xlsx:
+        part_nums, part_descs, levels = read_xlsx_columns(import_path,
+                            ["Component number", "Object description",
+                                        ("Explosion level", "Level", "Lv")])
+        edges, descs = extract_multilev_bom_arrays(part_nums, part_descs,
+                                        levels, pn, file_name, verbose=verbose)
+    else:
+        edges, descs = extract_multilev_bom_edges(import_df, pn, file_name,
+                                                            verbose=verbose)
+    return make_parsed_report(pn, file_name, edges, descs)
+
+
+def parse_SAP_multi_BOM_report_txt(import_path, verbose=False):
+    """Read a multi-level BOM exported from SAP CS11 process runner
+    ("Level-by-Level" BOM explosion). Non-AGS platforms are skipped.
+    Returns parsed report (see make_parsed_report()), or None if file isn't
+    this type of report.
+    """
+    file_name = os.path.basename(import_path)
+
+    filename_regex = r"^(\d{6}|\d{8})_01.txt$"
+    matches = re.findall(filename_regex, file_name, flags=re.IGNORECASE)
+    if not len(matches) == 1:
+        # ignore files not matching expected report pattern
+        if verbose:
+            print("Unrecognized report-name format (skipping): %s\n" % file_name)
+        return None
+
+    file_pn_regex = r"^(\d{6}|\d{8})(?=_)"
+    pn_matches = re.findall(file_pn_regex, file_name, flags=re.IGNORECASE)
+    if len(matches) == 1:
+        pn = pn_matches[0]
+    else:
+        raise Exception("Can't find P/N in filename: %s" % file_name)
+
+    # Exclude non-AGS platforms.
+    if pn not in platforms.platform_pns_AGS_base:
+        return None
+
+    # Read in table from text file
+    print("\nReading data from %s..." % file_name)
+    edges, descs = extract_cs11_text_edges(import_path, pn, file_name,
+                                                            verbose=verbose)
+    return make_parsed_report(pn, file_name, edges, descs)
+
+
+def get_report_cache_key(report_type, import_path, platform_pns=()):
+    """Fingerprint of a report file as parsed for given report type: path,
+    size and mod. time, plus anything else the parsed result depends on.
+    Returns None if file can't be read.
+    """
+    try:
+        file_stat = os.stat(import_path)
+    except OSError:
+        return None
+    if report_type == "SAP_multi_w":
+        # Orphan rules depend on the set of platforms.
+        platform_pns = tuple(sorted(platform_pns))
+    elif report_type == "SAP_multi_BOM_text":
+        # Files for platforms not on the AGS list are skipped, so a platform
+        # taken off the list must not still be read from cache.
+        platform_pns = tuple(sorted(platforms.platform_pns_AGS_base))
+    else:
+        platform_pns = ()
+    return (REPORT_PARSER_VERSION, report_type, os.path.abspath(import_path),
+                file_stat.st_size, file_stat.st_mtime_ns, platform_pns)
+
+
+def get_report_cache_path(cache_key):
+    """Path of cache file holding parsed report for given cache key.
+    """
+    key_hash = hashlib.sha1(repr(cache_key).encode("utf-8")).hexdigest()
+    return os.path.join(REPORT_CACHE_DIR, key_hash + ".pkl")
+
+
+def load_cached_report(cache_key):
+    """Returns cached parsed report for given cache key, or None if there
+    isn't a (readable) one.
+    """
+    cache_path = get_report_cache_path(cache_key)
+    try:
+        with open(cache_path, "rb") as cache_file:
+            cache_entry = pickle.load(cache_file)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Truncated or otherwise unreadable entry. Treat as a miss (will be
+        # overwritten).
+        return None
+    if cache_entry.get("key") != cache_key:
+        return None
+
+    # Refresh mod. time so pruning evicts least-recently-used entries first.
+    try:
+        os.utime(cache_path)
+    except OSError:
+        pass
+    return cache_entry["report"]
+
+
+def save_cached_report(cache_key, parsed_report):
+    """Write parsed report to cache. Written to a temp file then renamed, so
+    concurrent workers (or an interrupted run) can't leave a partial entry.
+    """
+    try:
+        write_pickle(get_report_cache_path(cache_key),
+                                    {"key": cache_key, "report": parsed_report})
+    except OSError as err:
+        print("Couldn't write report cache entry (%s)" % err)
+
+
+def write_pickle(pickle_path, data):
+    """Pickle data to given path by way of a temp file in the same folder, so
+    the file at pickle_path is always either the old or the new version.
+    """
+    pickle_dir = os.path.dirname(pickle_path)
+    os.makedirs(pickle_dir, exist_ok=True)
+    temp_fd, temp_path = tempfile.mkstemp(dir=pickle_dir, suffix=".tmp")
+    try:
+        with os.fdopen(temp_fd, "wb") as pickle_file:
+            pickle.dump(data, pickle_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, pickle_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def prune_report_cache(max_files=REPORT_CACHE_MAX_FILES,
+                max_bytes=REPORT_CACHE_MAX_BYTES, cache_dir=REPORT_CACHE_DIR):
+    """Delete least-recently-used cache entries until cache is within both
+    file-count and total-size limits. Also used for render cache.
+    """
+    if not os.path.isdir(cache_dir):
+        return
+    cache_entries = []
+    for entry in os.scandir(cache_dir):
+        if not entry.is_file():
+            continue
+        entry_stat = entry.stat()
+        cache_entries.append((entry_stat.st_mtime, entry_stat.st_size,
+                                                                entry.path))
+    cache_entries.sort()    # oldest first
+
+    total_bytes = sum(entry[1] for entry in cache_entries)
+    file_count = len(cache_entries)
+    for _, entry_size, entry_path in cache_entries:
+        if file_count <= max_files and total_bytes <= max_bytes:
+            break
+        try:
+            os.remove(entry_path)
+        except OSError:
+            continue
+        file_count -= 1
+        total_bytes -= entry_size
+
+
+def parse_report_file(report_type, import_path, platform_pns=(), verbose=False,
+                                            use_cache=False, stream_xlsx=False):
+    """Parse one file in import folder as the given report type. Module-level
+    so it can run in a worker process.
+    stream_xlsx selects the row-streaming .xlsx reader (see iter_xlsx_rows()).
+    Both readers give the same result, so cache entries are shared.
+    If use_cache is True, a cached result is returned if the file is unchanged
+    since it was last parsed (see get_report_cache_key()), and new results
+    are saved to the cache.
+    Returns parsed report, or None if file isn't that type of report.
+    """
+    if use_cache:
+        cache_key = get_report_cache_key(report_type, import_path, platform_pns)
+        if cache_key:
+            parsed_report = load_cached_report(cache_key)
+            if parsed_report:
+                print("\nReading cached data for %s..."
+                                            % os.path.basename(import_path))
+                return parsed_report
+            parsed_report = parse_report_file(report_type, import_path,
+                    platform_pns, verbose=verbose, stream_xlsx=stream_xlsx)
+            if parsed_report:
+                save_cached_report(cache_key, parsed_report)
+            return parsed_report
+
+    if report_type == "SAPTC":
+        return parse_SAPTC_report(import_path, verbose=verbose,
+                                                        stream_xlsx=stream_xlsx)
+    elif report_type == "SAP_multi_w":
+        return parse_SAP_multi_w_report(import_path, platform_pns,
+                                    verbose=verbose, stream_xlsx=stream_xlsx)
+    elif report_type == "SAP_multi_BOM_xlsx":
+        return parse_SAP_multi_BOM_report_xlsx(import_path, verbose=verbose,
+                                                        stream_xlsx=stream_xlsx)
+    elif report_type == "SAP_multi_BOM_text":
+        return parse_SAP_multi_BOM_report_txt(import_path, verbose=verbose)
+    else:
+        raise Exception("Unrecognized report type: %s" % report_type)
+
+
+def get_remote_eff_date_str(import_dir):
+    """Return effectivity date (YYYYMMDD) of the remote CS11 exports in
+    import_dir. Exports are all run together, with effectivity 4 days after
+    the date the files were written.
+    """
+    sample_file = os.listdir(import_dir)[0] # all are the same.
+    cs11_eff_date = time.localtime(os.path.getmtime(os.path.join(import_dir, sample_file)))
+    # Have to convert to datetime obj to do 4-day shift:
+    cs11_eff_date_shifted = datetime.fromtimestamp(time.mktime(cs11_eff_date)) + timedelta(days=4)
+    # https://stackoverflow.com/questions/1697815/how-do-you-convert-a-time-struct-time-object-into-a-datetime-object
+    return datetime.strftime(cs11_eff_date_shifted, DATE_FORMAT_SHORT)
+
+
+def read_target_file(target_path):
+    """Read list of target parts from text file. Returns list of
+    (P/N, description) tuples in file order. Format of each line can be either
+    [P/N] or [P/N]-[DESCRIPTION]. Blank lines and lines starting with "#" are
+    skipped.
+    """
+    target_filename = os.path.basename(target_path)
+    assert os.path.exists(target_path), "Can't find %s" % target_filename
+
+    target_list = []
+    with open(target_path, "r") as target_file_it:
+        lines = target_file_it.read().splitlines()
+        # https://stackoverflow.com/questions/19062574/read-file-into-list-and-strip-newlines
+        for i, target_part_line in enumerate(lines):
+            if not target_part_line or target_part_line.startswith("#"):
+                # Skip blank lines
+                # print("\tLine %d empty or commented out" % i)
+                continue
+            target_part_line = target_part_line.lstrip()
+            target_part_line = target_part_line.rstrip()
+            target_pn = target_part_line.split("-")[0]
+
+            assert len(target_pn) >= 6, ("\nEncountered %s in file %s. "
+                                        "Expected a P/N of length >= 6."
+                                      % (target_part_line, target_filename))
+            if len(target_part_line.split("-")) > 1:
+                # Including description isn't necessary in target_parts
+                # list.
+                target_desc = target_part_line[len(target_pn)+1:]
+                assert len(target_desc) > 1, ("\nEncountered %s in file "
+                        "%s. Expected a description after P/N and dash."
+                                      % (target_part_line, target_filename))
+            else:
+                target_desc = ""
+            target_list.append((target_pn, target_desc))
+    return target_list
+
+
+def decode_bits(bits, item_list):
+    """Return list of items from item_list whose bits are set in int bitset
+    (bit i for item_list[i]), in item_list order.
+    """
+    items = []
+    while bits:
+        low_bit = bits & -bits
+        items.append(item_list[low_bit.bit_length() - 1])
+        bits ^= low_bit
+    return items
+
+
+def write_parts_columns(part_rows, export_path, export_format):
+    """Write (P/N, description, can-obs flag, platform P/N list) rows from
+    iterable to Parquet or Feather file, a batch at a time so the whole
+    export never has to be held in memory. Flag and platform list columns
+    are null where rows have None.
+    """
+    # https://arrow.apache.org/docs/python/parquet.html
+    # https://arrow.apache.org/docs/python/feather.html (Feather V2 is the
+    # Arrow IPC file format)
+    schema = pa.schema([("pn", pa.string()),
+                        ("description", pa.string()),
+                        ("can_obs", pa.bool_()),
+                        ("platforms", pa.list_(pa.string()))])
+    if export_format == "parquet":
+        writer = pa_parquet.ParquetWriter(export_path, schema)
+    else:
+        writer = pa.ipc.new_file(export_path, schema)
+    part_rows = iter(part_rows)
+    with writer:
+        while True:
+            batch_rows = list(islice(part_rows, PARTS_EXPORT_BATCH_SIZE))
+            if not batch_rows:
+                break
+            columns = [pa.array(column, type=field.type) for column, field
+                                            in zip(zip(*batch_rows), schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(columns,
+                                                                schema=schema))
+
+
+def collect_union_boms(target_nodes, get_children, is_platform):
+    """Find union BOM (node plus every node below it) of each target node,
+    where nodes are parts or node IDs, get_children(node) gives a node's
+    children and is_platform(node) tells if walk should stop below a node.
+    Returns dict of union BOM sets keyed by target node.
+    Nodes that more than one node in these BOMs use (shared assemblies)
+    have their descendants found only once and reused (see get_subtree()), up
+    to UNION_CACHE_MAX_PARTS cached nodes in total.
+    """
+    # Count how many parents each node has within the combined BOM. Only
+    # assemblies (nodes w/ children) are worth caching.
+    parent_counts = {}
+    assy_nodes = set()
+    visit_queue = deque(target_nodes)
+    visited = set(target_nodes)
+    while visit_queue:
+        node = visit_queue.popleft()
+        for child in get_children(node):
+            assy_nodes.add(node)
+            parent_counts[child] = parent_counts.get(child, 0) + 1
+            if child not in visited and not is_platform(child):
+                visited.add(child)
+                visit_queue.append(child)
+    shared_nodes = set({node for node in assy_nodes
+                                        if parent_counts.get(node, 0) > 1})
+    shared_nodes.update(target_nodes)
+
+    subtree_cache = {}
+    # Room left in cache (in a list so get_subtree() calls can update it).
+    cache_room = [UNION_CACHE_MAX_PARTS]
+    union_boms = {}
+    for target_node in target_nodes:
+        union_bom = set(get_subtree(target_node, get_children, is_platform,
+                    assy_nodes, subtree_cache, shared_nodes, set(), cache_room))
+        union_bom.add(target_node)
+        union_boms[target_node] = union_bom
+    return union_boms
+
+
+def get_subtree(node, get_children, is_platform, assy_nodes, subtree_cache,
+                                        shared_nodes, in_progress, cache_room):
+    """Return frozenset of every node below given node (walk stops below
+    platforms). Only nodes in assy_nodes (those w/ children) are walked below.
+    Walk takes the cached result for any node in shared_nodes
+    instead of walking below it, computing and caching it in subtree_cache
+    first if needed (and if it fits in cache_room[0] nodes).
+    in_progress holds nodes whose subtrees are being computed further up the
+    call stack. In a circular BOM those are walked through normally.
+    """
+    if node in subtree_cache:
+        return subtree_cache[node]
+    in_progress.add(node)
+    subtree = set()
+    visit_queue = deque([node])
+    while visit_queue:
+        node_j = visit_queue.popleft()
+        for child in get_children(node_j):
+            if child in subtree:
+                continue
+            subtree.add(child)
+            if child not in assy_nodes or is_platform(child):
+                # Nothing below, or platform (walk doesn't continue through).
+                continue
+            elif child in shared_nodes and child not in in_progress:
+                subtree.update(get_subtree(child, get_children, is_platform,
+                                assy_nodes, subtree_cache, shared_nodes,
+                                                    in_progress, cache_room))
+            else:
+                visit_queue.append(child)
+    in_progress.discard(node)
+
+    subtree = frozenset(subtree)
+    if node in shared_nodes and len(subtree) <= cache_room[0]:
+        subtree_cache[node] = subtree
+        cache_room[0] -= len(subtree)
+    return subtree
+
+
 class PartGroup(object):
     """Represents a group of parts (Part and/or Platform objects).
     target_Parts attribute contains set of parts of interest, read from txt file.
     report_Parts attribute contains set of parts which have reports in import
     folder.
+    import_workers is the number of worker processes used to parse report
+    files in import_all_reports() (1 means parse serially).
+    If report_cache is True, parsed reports are cached in REPORT_CACHE_DIR and
+    reused while the report file is unchanged.
+    If snapshot_path is given, a remote CS11 import is saved there as a
+    snapshot of the whole group and reloaded on later runs as long as the
+    exports' effectivity date hasn't changed.
+    If stream_xlsx is True, .xlsx reports are streamed row by row (see
+    iter_xlsx_rows()) instead of loaded w/ pandas.
     """
-    def __init__(self):
-        self.Parts = set()
+    def __init__(self, import_workers=1, report_cache=True, snapshot_path=None,
+                                                            stream_xlsx=False):
+        self.import_workers = import_workers
+        self.report_cache = report_cache
+        self.snapshot_path = snapshot_path
+        self.stream_xlsx = stream_xlsx
+
+        # Registry of every part in the group, keyed by P/N. Authoritative
+        # store behind add_part()/get_part()/get_parts().
+        self.Parts = {}
+        # Subset of registry holding only Platform objects, keyed by P/N.
+        self.Platforms = {}
 
         # Initialize list of parts of interest. To be populated depending on
         # program operating mode (in import_all_reports method).
@@ -229,12 +1262,37 @@ class PartGroup(object):
         # Type of report(s) being used to build PartGroup. Set in import method.
         self.report_type = None
 
+        # Folder reports are read from, and record of each file imported from
+        # it, keyed by path. Each record holds the file's fingerprint (see
+        # get_report_cache_key()) and the P/N and links of the report read
+        # from it (None if file wasn't a report). Used by import_new_reports()
+        # to skip files that haven't changed.
+        self.import_dir = None
+        self.imported_files = {}
+
         # print("\nParts:\t      %r" % self.Parts) # DEBUG
         # print("Report parts: %r" % self.report_Parts) # DEBUG
         # print("Target parts: %r" % self.target_Parts) # DEBUG
 
         self.eff_date_str = None        # Not used in all cases. Check if None before using.
 
+        # Cache of each part's ancestor closure (all parents above it), keyed
+        # by P/N. Filled lazily by get_ancestors(). Entries are dropped by
+        # link_parts() when a new edge changes a part's ancestry.
+        self.ancestor_cache = {}
+        # List of all parts w/ each part after all its parents. Built by
+        # get_topo_order(); reset to None when parts or edges are added.
+        self.topo_order = None
+        # Can-obsolete status of every part keyed by P/N. Filled in one pass
+        # by evaluate_obs_status(); reset to None when parts or edges are added.
+        self.obs_status = None
+        # Platforms each part is used on, as int bitsets over
+        # platform_bit_list (bit i set if used on platform_bit_list[i]). Filled
+        # in one pass by evaluate_platform_bits(); reset along w/ obs_status.
+        self.platform_bits = None
+        self.platform_bit_list = []
+        self.platform_obs_bits = 0
+
     def import_platforms(self, platform_dict):
         """Read in platform data from given dictionary (where key is PN and
         value is True/False for can_obs).
@@ -249,23 +1307,277 @@ class PartGroup(object):
         print("done")
 
     def add_part(self, Part_i):
-        self.Parts.add(Part_i)
+        # Existing object stays registered if same P/N added again (matches
+        # previous set-based behavior for the same object).
+        if Part_i.get_pn() not in self.Parts:
+            self.Parts[Part_i.get_pn()] = Part_i
+            self.topo_order = None
+            self.obs_status = None
+            self.platform_bits = None
+        if isinstance(Part_i, Platform):
+            self.Platforms.setdefault(Part_i.get_pn(), Part_i)
 
     def get_part(self, part_num):
-        for Part_i in self.Parts:
-            if part_num == Part_i.get_pn():
-                return Part_i
-        return False # only happens if no match found in loop.
+        return self.Parts.get(part_num, False) # False if no match found.
+
+    def get_part_count(self):
+        return len(self.Parts)
+
+    def has_part(self, Part_i):
+        """Return True if this exact Part object is registered in the group.
+        """
+        return self.Parts.get(Part_i.get_pn()) is Part_i
 
     def get_parts(self, omit_platforms=False):
         if omit_platforms:
-            return self.Parts - self.get_platforms()
+            return set({Part_i for pn, Part_i in self.Parts.items()
+                                                if pn not in self.Platforms})
         else:
-            return self.Parts
+            return set(self.Parts.values())
 
     def get_target_parts(self):
         return self.target_Parts
 
+    def link_parts(self, ChildPart, ParentPart):
+        """Add ParentPart as a parent of ChildPart and drop any cached ancestor
+        closures that the new edge makes stale.
+        """
+        ChildPart.add_parent(ParentPart)
+        self.invalidate_ancestors(ChildPart)
+        self.topo_order = None
+        self.obs_status = None
+        self.platform_bits = None
+
+    def unlink_parts(self, ChildPart, ParentPart):
+        """Remove ParentPart as a parent of ChildPart and drop cached ancestor
+        closures that included it.
+        """
+        ChildPart.remove_parent(ParentPart)
+        self.invalidate_ancestors(ChildPart)
+        self.topo_order = None
+        self.obs_status = None
+        self.platform_bits = None
+
+    def invalidate_ancestors(self, Part_i):
+        """Drop cached ancestor closures for Part_i and every part below it.
+        If a part has no cached closure, none of its descendants can either
+        (computing a closure caches the closures of everything above it), so
+        the walk stops there.
+        """
+        visit_stack = [Part_i]
+        while visit_stack:
+            Part_j = visit_stack.pop()
+            if self.ancestor_cache.pop(Part_j.get_pn(), None) is None:
+                continue
+            visit_stack.extend(Part_j.Children.values())
+
+    def get_ancestors(self, Part_i):
+        """Return frozenset of all parents above Part_i in the hierarchy (same
+        result as Part.get_parents_above()). Closures are computed once per
+        part, parents first, and cached until invalidated by new edges.
+        """
+        cached = self.ancestor_cache.get(Part_i.get_pn())
+        if cached is not None:
+            return cached
+
+        # Depth-first walk up the tree. A part is only finalized once all its
+        # parents have been, so each closure is built from its parents' cached
+        # closures (reverse topological order).
+        visit_stack = [(Part_i, False)]
+        in_progress = set()
+        finalized = []
+        while visit_stack:
+            Part_j, parents_done = visit_stack.pop()
+            pn = Part_j.get_pn()
+            if pn in self.ancestor_cache:
+                continue
+            if parents_done:
+                in_progress.discard(pn)
+                ancestors = set()
+                for Parent_k in Part_j.Parents.values():
+                    ancestors.add(Parent_k)
+                    if not isinstance(Parent_k, Platform):
+                        ancestors.update(self.ancestor_cache.get(
+                                                    Parent_k.get_pn(), ()))
+                self.ancestor_cache[pn] = frozenset(ancestors)
+                finalized.append(pn)
+                continue
+            if pn in in_progress:
+                # Part is its own ancestor (circular BOM). Closures built on this
+                # walk would be incomplete, so discard them and fall back to an
+                # uncached walk for the requested part.
+                for done_pn in finalized:
+                    del self.ancestor_cache[done_pn]
+                return frozenset(Part_i.get_parents_above())
+            in_progress.add(pn)
+            visit_stack.append((Part_j, True))
+            for Parent_k in Part_j.Parents.values():
+                if (not isinstance(Parent_k, Platform)
+                            and Parent_k.get_pn() not in self.ancestor_cache):
+                    visit_stack.append((Parent_k, False))
+
+        return self.ancestor_cache[Part_i.get_pn()]
+
+    def get_parents_above(self, Part_i, assy_only=False):
+        """Returns set of all parents above Part_i in the hierarchy, using the
+        cached ancestor closures.
+        """
+        if assy_only:
+            return filter_assy_parts(self.get_ancestors(Part_i))
+        return set(self.get_ancestors(Part_i))
+
+    def get_platform_refs(self, Part_i):
+        """Return set of platforms where Part_i is used, using results of
+        evaluate_platform_bits() (run first if needed).
+        """
+        if not self.has_part(Part_i):
+            return set({Part_j for Part_j in self.get_ancestors(Part_i)
+                                                    if Part_j.is_platform()})
+        return set(self.get_platform_app(Part_i)[0])
+
+    def evaluate_platform_bits(self):
+        """Determine which platforms every part in group is used on in a single
+        pass, parents before children. Each part's platforms (same as the
+        platforms in get_ancestors()) are stored as an int bitset over
+        platform_bit_list, which is sorted by P/N. A platform passes only its
+        own bit down, since ancestor walks don't continue above platforms.
+        Parts caught in (or below) a circular BOM use their ancestor closures.
+        """
+        self.platform_bit_list = sorted(Part_i for Part_i in self.get_topo_order()
+                                                    if Part_i.is_platform())
+        own_bits = {Platform_i.get_pn(): 1 << bit_num
+                    for bit_num, Platform_i in enumerate(self.platform_bit_list)}
+        self.platform_obs_bits = 0
+        for Platform_i in self.platform_bit_list:
+            if self.get_obs_status(Platform_i):
+                self.platform_obs_bits |= own_bits[Platform_i.get_pn()]
+
+        platform_bits = {}
+        for Part_i in self.get_topo_order():
+            part_bits = 0
+            for parent_pn in Part_i.Parents:
+                parent_bits = own_bits.get(parent_pn)
+                if parent_bits is None:
+                    parent_bits = platform_bits.get(parent_pn)
+                if parent_bits is None:
+                    # Parent not done yet only if BOM is circular.
+                    part_bits = 0
+                    for Part_j in self.get_ancestors(Part_i):
+                        part_bits |= own_bits.get(Part_j.get_pn(), 0)
+                    break
+                part_bits |= parent_bits
+            platform_bits[Part_i.get_pn()] = part_bits
+        self.platform_bits = platform_bits
+        return self.platform_bits
+
+    def get_platform_app(self, Part_i):
+        """Return sorted list of platforms where Part_i is used, and True if
+        every one of them can be obsoleted (also True if there are none). Read
+        from evaluate_platform_bits() results (run first if needed).
+        """
+        if not self.has_part(Part_i):
+            Platforms_list = sorted(self.get_platform_refs(Part_i))
+            return Platforms_list, False not in [self.get_obs_status(Platform_i)
+                                            for Platform_i in Platforms_list]
+        if self.platform_bits is None:
+            self.evaluate_platform_bits()
+        part_bits = self.platform_bits[Part_i.get_pn()]
+        return (decode_bits(part_bits, self.platform_bit_list),
+                                    not part_bits & ~self.platform_obs_bits)
+
+    def get_topo_order(self):
+        """Return list of every part in group, ordered so each part comes after
+        all of its parents (platforms and orphans first, target parts last).
+        Parts caught in a circular BOM are appended at the end.
+        """
+        if self.topo_order is not None:
+            return self.topo_order
+
+        parent_counts = {pn: len(Part_i.Parents)
+                                        for pn, Part_i in self.Parts.items()}
+        visit_queue = deque(Part_i for pn, Part_i in sorted(self.Parts.items())
+                                                    if not parent_counts[pn])
+        topo_order = []
+        while visit_queue:
+            Part_i = visit_queue.popleft()
+            topo_order.append(Part_i)
+            for child_pn, Child_j in Part_i.Children.items():
+                if child_pn not in parent_counts:
+                    continue
+                parent_counts[child_pn] -= 1
+                if parent_counts[child_pn] == 0:
+                    visit_queue.append(Child_j)
+
+        if len(topo_order) < len(self.Parts):
+            topo_order.extend(self.Parts[pn] for pn in sorted(parent_counts)
+                                                    if parent_counts[pn] > 0)
+        self.topo_order = topo_order
+        return self.topo_order
+
+    def evaluate_obs_status(self):
+        """Determine can-obsolete status of every part in group in a single
+        pass, parents before children. Same rules as Part.get_obs_status():
+        "OBS" prefix means True, platforms use their platforms.py status, and
+        anything else can only be obsoleted if all its parents can.
+        Stores results in obs_status dict (and each part's can_obs attribute).
+        Parts caught in (or below) a circular BOM are repeated until none of
+        them change.
+        """
+        topo_order = self.get_topo_order()
+        obs_status = {}
+        # Index of first part evaluated before all its parents were.
+        loop_start = None
+        for topo_index, Part_i in enumerate(topo_order):
+            if isinstance(Part_i, Platform):
+                can_obs = Part_i.get_obs_status()
+            elif Part_i.get_obs_disp():
+                can_obs = True
+            else:
+                can_obs = True
+                for parent_pn in Part_i.Parents:
+                    parent_can_obs = obs_status.get(parent_pn)
+                    if parent_can_obs is None:
+                        # Parent not done yet only if BOM is circular.
+                        if loop_start is None:
+                            loop_start = topo_index
+                    elif not parent_can_obs:
+                        can_obs = False
+                        break
+                Part_i.can_obs = can_obs
+            obs_status[Part_i.get_pn()] = can_obs
+
+        if loop_start is not None:
+            # Parts from here on start out True and are cleared if any parent
+            # can't be obsoleted. Status only ever goes from True to False, so
+            # repeating until nothing changes always finishes.
+            Loop_list = [Part_i for Part_i in topo_order[loop_start:]
+                            if not isinstance(Part_i, Platform)
+                            and not Part_i.get_obs_disp()]
+            changed = True
+            while changed:
+                changed = False
+                for Part_i in Loop_list:
+                    if obs_status[Part_i.get_pn()] and not all(
+                                        obs_status.get(parent_pn, True)
+                                        for parent_pn in Part_i.Parents):
+                        obs_status[Part_i.get_pn()] = False
+                        Part_i.can_obs = False
+                        changed = True
+        self.obs_status = obs_status
+        return self.obs_status
+
+    def get_obs_status(self, Part_i):
+        """Return True or False based on if the given part is okay to obsolete,
+        using results of evaluate_obs_status() (run first if needed).
+        """
+        if self.obs_status is None:
+            self.evaluate_obs_status()
+        can_obs = self.obs_status.get(Part_i.get_pn())
+        if can_obs is None or not self.has_part(Part_i):
+            # Part not in group (e.g. target part not found in reports).
+            return Part_i.get_obs_status(silent=True)
+        return can_obs
+
     def get_report_parts(self):
         return self.report_Parts
 
@@ -284,8 +1596,9 @@ class PartGroup(object):
 
         # Ensure target parts are included in parts found in reports. Otherwise
         # will be missing its BOM members.
-        if not self.target_Parts.issubset(self.Parts):
-            missing_target_parts = self.target_Parts - self.target_Parts.intersection(self.Parts)
+        missing_target_parts = set({TargetPart for TargetPart in self.target_Parts
+                                            if not self.has_part(TargetPart)})
+        if missing_target_parts:
             print("\n%d of %d target parts not found in report(s):" %
                         (len(missing_target_parts), len(self.target_Parts)))
             for pn in sorted(missing_target_parts):
@@ -297,31 +1610,51 @@ class PartGroup(object):
 
             if not answer.lower() == "y":
                 quit()
-        else:
-            missing_target_parts = set()
 
         self.target_Parts.difference_update(missing_target_parts)
         # Delay adding target parts to self.Parts so above check can be conducted.
-        self.Parts.update(self.target_Parts)
+        for TargetPart in self.target_Parts:
+            self.add_part(TargetPart)
 
-        # Start w/ target parts as basis for union BOM.
+        # Start w/ target parts as basis for union BOM and add every part
+        # found walking down from them.
         union_bom = self.target_Parts.copy()
-        # Test each part in group to see if the union of its parents (all the
-        # way up the tree) contains any of the target parts. If so, add this
-        # part to the union BOM.
-        for Part_i in self.Parts:
-            if Part_i in union_bom:
-                continue
-            elif self.target_Parts.intersection(Part_i.get_parents_above()):
-                # print("Parents of %s: %r" % (NewPart, NewPart.get_parents()))
-                # print("Parents above %s: %r" % (NewPart, NewPart.get_parents_above(set())))
-                union_bom.add(Part_i)
+        union_bom.update(self.get_descendants(self.target_Parts))
 
         return union_bom
 
+    def get_descendants(self, Parts_set):
+        """Return set of all parts used at any level below the given parts,
+        found by walking down through each part's children (breadth-first).
+        Cost depends only on the size of the result.
+        Like get_ancestors(), doesn't continue through platforms.
+        """
+        descendants = set()
+        visit_queue = deque(Parts_set)
+        while visit_queue:
+            Part_i = visit_queue.popleft()
+            for Child_j in Part_i.Children.values():
+                if Child_j in descendants:
+                    continue
+                descendants.add(Child_j)
+                if not isinstance(Child_j, Platform):
+                    visit_queue.append(Child_j)
+        return descendants
+
+    def get_union_boms(self, Targets_set):
+        """Return dict of union BOM (target part plus every part below it) for
+        each of the given target parts, keyed by target part. Assemblies shared
+        between BOMs are only walked once (see collect_union_boms()).
+        """
+        return collect_union_boms(Targets_set,
+                            lambda Part_i: Part_i.Children.values(),
+                                            lambda Part_i: Part_i.is_platform())
+
     def get_platforms(self):
-        return set({Part_i for Part_i in self.Parts
-                                               if isinstance(Part_i, Platform)})
+        return set(self.Platforms.values())
+
+    def get_platform_pns(self):
+        return set(self.Platforms)
 
     def print_obs_status_trace(self):
         """Print can-obsolete status for each part in Parts set.
@@ -340,7 +1673,7 @@ class PartGroup(object):
         print("\nTarget parts OBS status:")
         for TargetPart in self.target_Parts:
             print("\t%s: Can OBS? %r" % (TargetPart,
-                                        TargetPart.get_obs_status(silent=True)))
+                                        self.get_obs_status(TargetPart)))
         if len(self.target_Parts) == 0:
             print("No target parts.")
 
@@ -349,50 +1682,25 @@ class PartGroup(object):
         Format of target_parts file can be either [P/N] or [P/N]-[DESCRIPTION].
         """
         target_filename = os.path.basename(TARGET_PARTS_PATH)
-        assert os.path.exists(TARGET_PARTS_PATH), "Can't find %s" % target_filename
-
         print("\nImporting list of target parts from %s..." % target_filename, end="")
-        with open(TARGET_PARTS_PATH, "r") as target_file_it:
-            lines = target_file_it.read().splitlines()
-            # https://stackoverflow.com/questions/19062574/read-file-into-list-and-strip-newlines
-            for i, target_part_line in enumerate(lines):
-                if not target_part_line or target_part_line.startswith("#"):
-                    # Skip blank lines
-                    # print("\tLine %d empty or commented out" % i)
-                    continue
-                target_part_line = target_part_line.lstrip()
-                target_part_line = target_part_line.rstrip()
-                target_pn = target_part_line.split("-")[0]
-
-                assert len(target_pn) >= 6, ("\nEncountered %s in file %s. "
-                                            "Expected a P/N of length >= 6."
-                                          % (target_part_line, target_filename))
-                if len(target_part_line.split("-")) > 1:
-                    # Including description isn't necessary in target_parts
-                    # list.
-                    target_desc = target_part_line[len(target_pn)+1:]
-                    assert len(target_desc) > 1, ("\nEncountered %s in file "
-                            "%s. Expected a description after P/N and dash."
-                                          % (target_part_line, target_filename))
-                else:
-                    target_desc = ""
-
-                if target_pn in map(str, self.target_Parts):
-                    # Make sure it's not duplicated in target_parts list
-                    # May not be in self.Parts yet
-                    continue
-                elif self.get_part(target_pn) == False:
-                    TargetPart = Part(target_pn, name=target_desc)
-                else:
-                    TargetPart = self.get_part(target_pn)
+        for target_pn, target_desc in read_target_file(TARGET_PARTS_PATH):
+            if target_pn in map(str, self.target_Parts):
+                # Make sure it's not duplicated in target_parts list
+                # May not be in self.Parts yet
+                continue
+            elif self.get_part(target_pn) == False:
+                TargetPart = Part(target_pn, name=target_desc)
+            else:
+                TargetPart = self.get_part(target_pn)
 
-                self.target_Parts.add(TargetPart)
-                # If target_parts file contains a duplicate, TargetPart will be
-                # original object and .add() will do nothing.
+            self.target_Parts.add(TargetPart)
+            # If target_parts file contains a duplicate, TargetPart will be
+            # original object and .add() will do nothing.
 
         if parts_update:
-            # Add target parts to overall Parts set.
-            self.Parts.update(self.target_Parts)
+            # Add target parts to overall Parts registry.
+            for TargetPart in self.target_Parts:
+                self.add_part(TargetPart)
 
         assert len(self.target_Parts) != 0, "No target parts found in %s" % target_filename
         print("done")
@@ -440,25 +1748,28 @@ class PartGroup(object):
 
             # Remind user that program will use remote CS11 exports w/ the
             # indicated effectivity date.
-            sample_file = os.listdir(import_dir)[0] # all are the same.
-            cs11_eff_date = time.localtime(os.path.getmtime(os.path.join(import_dir, sample_file)))
-            # Have to convert to datetime obj to do 4-day shift:
-            cs11_eff_date_shifted = datetime.fromtimestamp(time.mktime(cs11_eff_date)) + timedelta(days=4)
-            # https://stackoverflow.com/questions/1697815/how-do-you-convert-a-time-struct-time-object-into-a-datetime-object
-            cs11_eff_date_str = datetime.strftime(cs11_eff_date_shifted, DATE_FORMAT_SHORT)
+            cs11_eff_date_str = get_remote_eff_date_str(import_dir)
             print(Fore.GREEN + Style.BRIGHT)
             input("Remote CS11 exports will be used. Effectivity date:\t%s\n"
                                 "Press Enter to continue." % cs11_eff_date_str
                                                     + Style.RESET_ALL)
             self.eff_date_str = "CS11eff%s" % cs11_eff_date_str
             print()
+
+            # Exports only refresh periodically. Reuse last run's group if
+            # it was built from this same set.
+            if self.snapshot_path and self.load_snapshot(self.snapshot_path,
+                                            report_type=self.report_type,
+                                            eff_date_str=self.eff_date_str,
+                                            import_dir=import_dir):
+                return
         elif import_subdir:
             import_dir = os.path.join(IMPORT_DIR, import_subdir)
         else:
             import_dir = IMPORT_DIR
 
-        file_list = os.listdir(import_dir)
-        file_list.sort()
+        self.import_dir = import_dir
+        self.imported_files = {}
 
         if self.report_type in ["SAPTC", "SAP_multi_w"]:
             self.import_target_parts()
@@ -470,22 +1781,16 @@ class PartGroup(object):
             # get_union_bom() - after reports imported.
             pass
 
-        for file_name in file_list:
-            if os.path.isdir(os.path.join(import_dir, file_name)):
-                continue
-            import_path = os.path.join(import_dir, file_name)
-
-            if self.report_type == "SAPTC":
-                self.import_SAPTC_report(import_path)
-            elif self.report_type == "SAP_multi_w":
-                self.import_SAP_multi_w_report(import_path)
-                find_missing = False
-            elif self.report_type == "SAP_multi_BOM_xlsx":
-                self.import_SAP_multi_BOM_report_xlsx(import_path)
-                find_missing = False
-            elif self.report_type == "SAP_multi_BOM_text":
-                self.import_SAP_multi_BOM_report_txt(import_path)
-                find_missing = False
+        import_paths = self.get_import_paths()
+        if self.report_type != "SAPTC":
+            # Only single-level where-used reports need missing-report search.
+            find_missing = False
+
+        if self.import_workers > 1 and len(import_paths) > 1:
+            self.import_reports_parallel(import_paths)
+        else:
+            for import_path in import_paths:
+                self.import_report_file(import_path)
 
         if not self.report_Parts:
             raise Exception("No reports of type '%s' found in %s\n" %
@@ -500,534 +1805,579 @@ class PartGroup(object):
         if find_missing:
             self.find_missing_reports()
 
-    def import_SAPTC_report(self, import_path, verbose=False):
-        """Read in a single-level where-used report generated by Teamcenter's
-        SAP plugin. Create Parts objects and link parts based on BOM hierarchy.
-        """
-        file_name = os.path.basename(import_path)
-
-        report_prefix = "SAPTC"
-        if not (file_name.startswith(report_prefix)
-                        and os.path.splitext(file_name)[-1].lower()==".xlsx"):
-            # ignore files not matching expected report pattern
-            if verbose:
-                print("Unrecognized report-name format (skipping): %s\n" % file_name)
-            return
-
-        print("\nReading data from %s..." % file_name)
-        excel_data = pd.read_excel(import_path, dtype=str, engine="openpyxl")
-        import_data = pd.DataFrame(excel_data)
-        # https://stackoverflow.com/a/41662442
-
-        part_num = import_data.iloc[0, 2]
-        part_desc = import_data.iloc[1, 2]
+        if self.snapshot_path and self.report_type == "SAP_multi_BOM_text":
+            self.save_snapshot(self.snapshot_path)
 
-        # Check fields are in expected locations
-        assert import_data.iloc[0, 0] == "Material:", ("Expected "
-                        "'Material:' in cell A2. "
-                        "Check formatting in %s." % file_name)
-        assert import_data.iloc[1, 0] == "Description:", ("Expected "
-                        "'Description:' in cell A3. "
-                        "Check formatting in %s." % file_name)
+        if self.report_cache:
+            prune_report_cache()
 
-        # Rudimentary data validation
-        assert len(part_num) >= 5, ("Found less than 5 digits "
-                        "where part number should be in cell C2. "
-                        "Check formatting in %s." % file_name)
-        assert len(part_desc) > 0, ("Found empty cell where "
-          "description string should be in cell C3. "
-                        "Check formatting in %s." % file_name)
-
-        # Add report part to PartsGroup
-        if self.get_part(part_num) == False:
-            ThisPart = Part(part_num, name=part_desc)
-            ThisPart.set_report_name(file_name)
-            if verbose:
-                print("\tAdding %s to group (report part)" % ThisPart)
-            self.add_part(ThisPart)
+    def get_import_paths(self):
+        """Return sorted list of paths of files in import folder.
+        """
+        file_list = os.listdir(self.import_dir)
+        file_list.sort()
+        return [os.path.join(self.import_dir, file_name)
+                            for file_name in file_list
+                if not os.path.isdir(os.path.join(self.import_dir, file_name))]
+
+    def get_file_fingerprint(self, import_path):
+        return get_report_cache_key(self.report_type, import_path,
+                                                        self.get_platform_pns())
+
+    def record_imported_file(self, import_path, fingerprint, parsed_report):
+        """Record file as read in. Report P/N and links (needed to undo the
+        import) are only kept for SAPTC reports, the only type re-imported
+        by import_new_reports(). Other types just get their fingerprint, so
+        a large import doesn't hold a second copy of every link.
+        """
+        if parsed_report and self.report_type == "SAPTC":
+            report_record = {"report_pn": parsed_report["report_pn"],
+                                            "edges": parsed_report["edges"]}
         else:
-            if verbose:
-                print("\tPart   %s already in group (report part)" % part_num)
-            ThisPart = self.get_part(part_num)
-            assert ThisPart not in self.report_Parts, ("Found multiple "
-                       "where-used reports in import folder for %s:\n\t%s\n\t%s"
-                   % (ThisPart.get_pn(), ThisPart.get_report_name(), file_name))
-            # If part doesn't have name/description stored, add it now.
-            if not ThisPart.get_name():
-                ThisPart.set_name(part_desc)
-            ThisPart.set_report_name(file_name)
-        self.report_Parts.add(ThisPart)
-
-        # Check table headers are in expected locations
-        assert import_data.iloc[5, 3] == "Component", ("Expected "
-                        "'Component' in cell D7. "
-                        "Check formatting in %s." % file_name)
-        assert import_data.iloc[5, 4] == "Component Description", (
-            "Expected 'Component Description' in cell D7. "
-                "Check formatting in %s." % file_name)
-
-        # Iterate through the results and associate parent to report part.
-        for idx in import_data.index[6:-1]:
-            parent_num = import_data.iloc[idx, 3]
-            parent_desc = import_data.iloc[idx, 4]
-
-            # Rudimentary data validation
-            assert len(parent_num) >= 5, ("Found less than 5 digits "
-                            "where part number should be in D%d. "
-                            "Check formatting in %s." % (idx+2, file_name))
-            assert len(parent_desc) > 0, ("Found empty cell where "
-                            "description string should be in cell E%d. "
-                            "Check formatting in %s." % (idx+2, file_name))
-
-            # Create and add this part to the group if not already in
-            # the Parts set.
-            if self.get_part(parent_num) == False:
-                NewParent = Part(parent_num, name=parent_desc)
-                if verbose:
-                    print("\n\tAdding %s to group" % NewParent)
-                self.add_part(NewParent)
-            else:
-                if verbose:
-                    print("\n\tPart   %s already in group" % parent_num)
-                NewParent = self.get_part(parent_num)
-                # If parent doesn't have name/description stored, add it now.
-                if not NewParent.get_name():
-                    NewParent.set_name(parent_desc)
-
-            # Add this part as a parent if not already in the Parents set.
-            if ThisPart.get_parent(parent_num) == False:
-                if verbose:
-                    print("\tAdding %s as parent of part %s" % (NewParent,
-                                                              ThisPart))
-                ThisPart.add_parent(NewParent)
-
-        print("...done")
-        # print("\nParts:\t      %r" % self.Parts) # DEBUG
-        # print("Report parts: %r" % self.report_Parts) # DEBUG
-        # print("Target parts: %r" % self.target_Parts) # DEBUG
+            report_record = None
+        self.imported_files[import_path] = {"fingerprint": fingerprint,
+                                                    "report": report_record}
 
-
-    def import_SAP_multi_w_report(self, import_path, verbose=False):
-        """Read in a multi-level where-used report exported from SAP CS15.
-        Create Parts objects and link parts based on BOM hierarchy.
+    def import_report_file(self, import_path):
+        """Read in one file from import folder as group's report type.
+        Returns parsed report (None if file isn't that type of report).
         """
-        file_name = os.path.basename(import_path)
-        report_prefix = "SAP_multi_w"
-        if not (file_name.startswith(report_prefix) and
-                              os.path.splitext(file_name)[-1].lower()==".xlsx"):
-            # ignore files not matching expected report pattern
-            if verbose:
-                print("Unrecognized report-name format (skipping): %s\n" % file_name)
-            return
-
-        print("\nReading data from %s..." % file_name)
-        excel_data = pd.read_excel(import_path, dtype=str, engine="openpyxl")
-        import_data = pd.DataFrame(excel_data)
-        # https://stackoverflow.com/a/41662442
-
-        pn_regex = r"(?<=^" + report_prefix + r"_)[\dA-Z]{1,40}(?=_\S*\.XLSX$|\.XLSX$)"
-        pn_matches = re.findall(pn_regex, file_name, flags=re.IGNORECASE)
-        if len(pn_matches) == 1:
-            part_num = pn_matches[0]
-        else:
+        # Fingerprint taken first so a file changed mid-read is seen as changed.
+        fingerprint = self.get_file_fingerprint(import_path)
+        if self.report_type == "SAPTC":
+            parsed_report = self.import_SAPTC_report(import_path)
+        elif self.report_type == "SAP_multi_w":
+            parsed_report = self.import_SAP_multi_w_report(import_path)
+        elif self.report_type == "SAP_multi_BOM_xlsx":
+            parsed_report = self.import_SAP_multi_BOM_report_xlsx(import_path)
+        elif self.report_type == "SAP_multi_BOM_text":
+            parsed_report = self.import_SAP_multi_BOM_report_txt(import_path)
+        self.record_imported_file(import_path, fingerprint, parsed_report)
+        return parsed_report
+
+    def import_new_reports(self):
+        """Read in only the files in import folder that are new or have changed
+        since they were imported. A changed or deleted report's previous links
+        are removed first (see remove_report_file()).
+        Returns set of parts found in the reports read in or removed.
+        """
+        assert self.report_type == "SAPTC", ("Only SAPTC reports can be "
+                                                        "re-imported.")
+        touched_pns = set()
+        import_paths = self.get_import_paths()
+        for import_path in sorted(set(self.imported_files) - set(import_paths)):
+            print("\n%s has been removed from import folder."
+                                                % os.path.basename(import_path))
+            touched_pns.update(self.remove_report_file(import_path))
+
+        for import_path in import_paths:
+            file_record = self.imported_files.get(import_path)
+            if (file_record and file_record["fingerprint"]
+                                    == self.get_file_fingerprint(import_path)):
+                continue
+            elif file_record:
+                print("\n%s has changed since it was read in."
+                                                % os.path.basename(import_path))
+                touched_pns.update(self.remove_report_file(import_path))
+
+            parsed_report = self.import_report_file(import_path)
+            if parsed_report:
+                touched_pns.add(parsed_report["report_pn"])
+                touched_pns.update(parsed_report["descs"])
+                for edge in parsed_report["edges"]:
+                    touched_pns.update(edge)
+        return set({self.get_part(part_num) for part_num in touched_pns})
+
+    def remove_report_file(self, import_path):
+        """Undo import of a file from import folder: drop its report part from
+        report_Parts and remove links that no other imported report contains.
+        Parts themselves stay in group. Returns set of P/Ns whose links or
+        report status changed.
+        """
+        report_record = self.imported_files.pop(import_path)["report"]
+        if not report_record:
+            return set()
+
+        kept_edges = set()
+        for file_record in self.imported_files.values():
+            if file_record["report"]:
+                kept_edges.update(map(tuple, file_record["report"]["edges"]))
+        for child_num, parent_num in report_record["edges"]:
+            if (child_num, parent_num) in kept_edges:
+                continue
+            ChildPart = self.get_part(child_num)
+            ParentPart = ChildPart.get_parent(parent_num)
+            if ParentPart:
+                self.unlink_parts(ChildPart, ParentPart)
+
+        ReportPart = self.get_part(report_record["report_pn"])
+        self.report_Parts.discard(ReportPart)
+        ReportPart.set_report_name(None)
+        # Parts whose links changed may need a report again.
+        touched_pns = set({report_record["report_pn"]})
+        for edge in report_record["edges"]:
+            touched_pns.update(edge)
+        return touched_pns
+
+    def import_reports_parallel(self, import_paths):
+        """Parse report files in a pool of import_workers worker processes.
+        Results are merged into group in the same (file) order as a serial
+        import, so duplicate-report checks and resulting group are the same.
+        """
+        if "fork" not in multiprocessing.get_all_start_methods():
+            # Without fork, each worker would re-run the calling script
+            # (where-used.py has no __main__ guard).
+            print("\nParallel import not available on this platform. "
+                                                        "Importing serially.")
+            for import_path in import_paths:
+                self.import_report_file(import_path)
             return
 
-        # Check fields are in expected locations
-        assert "Level" in import_data.columns, ("Expected "
-                                        "'Level' in cell A1. "
-                                        "Check formatting in %s." % file_name)
-        assert "Object description" in import_data.columns, ("Expected "
-                                        "'Object description' in cell D1. "
-                                        "Check formatting in %s." % file_name)
-        assert "Component number" in import_data.columns, ("Expected "
-                                        "'Component number' in cell E1. "
-                                        "Check formatting in %s." % file_name)
+        print("\nParsing %d files w/ %d worker processes..."
+                                % (len(import_paths), self.import_workers))
+        fingerprints = list(map(self.get_file_fingerprint, import_paths))
+        with ProcessPoolExecutor(max_workers=self.import_workers,
+                        mp_context=multiprocessing.get_context("fork")) as executor:
+            parsed_reports = executor.map(parse_report_file,
+                                    repeat(self.report_type), import_paths,
+                                    repeat(self.get_platform_pns()),
+                                    repeat(False), repeat(self.report_cache),
+                                    repeat(self.stream_xlsx))
+            # map() yields results in order of import_paths.
+            for import_path, fingerprint, parsed_report in zip(import_paths,
+                                                fingerprints, parsed_reports):
+                if parsed_report:
+                    self.import_parsed_report(parsed_report)
+                self.record_imported_file(import_path, fingerprint,
+                                                                parsed_report)
+        print("\nPart count:\t%d" % self.get_part_count())
 
-        # Add report part to PartsGroup
-        if self.get_part(part_num) == False:
-            ReportPart = Part(part_num) # no description/name given
-            if verbose:
-                print("\tAdding %s to group (report part)" % ReportPart)
-            self.add_part(ReportPart)
-        else:
-            if verbose:
-                print("\tPart   %s already in group (report part)" % part_num)
-            ReportPart = self.get_part(part_num)
-            assert ReportPart not in self.report_Parts, ("Found multiple "
-                  "where-used reports in import folder for %s:\n\t%s\n\t%s"
-                   % (ReportPart.get_pn(), ReportPart.get_report_name(), file_name))
-        ReportPart.set_report_name(file_name)
-        self.report_Parts.add(ReportPart)
-
-        # Add extra row of NaNs to simplify loop processing.
-        import_data.loc[len(import_data)] = np.nan
-        # Find NaNs that divide groups.
-        nan_index = import_data["Level"][import_data["Level"].isna()].index
-        # If only one grouping exists, there will be no NaNs.
-
-        # Create dictionary to store most recent part in each "level".
-        level_dict = {}
+    def import_SAPTC_report(self, import_path, verbose=False):
+        """Read in a single-level where-used report generated by Teamcenter's
+        SAP plugin. Create Parts objects and link parts based on BOM hierarchy.
+        """
+        parsed_report = parse_report_file("SAPTC", import_path,
+                            verbose=verbose, use_cache=self.report_cache,
+                                                stream_xlsx=self.stream_xlsx)
+        if parsed_report:
+            self.import_parsed_report(parsed_report, verbose=verbose)
+            print("...done")
+        return parsed_report
 
-        # Separate each grouping to loop through separately.
-        # Identify top level of each group
-        start_pos = 0
-        if verbose:
-            print(import_data.to_string(max_rows=10, max_cols=7))
-        for break_pos in nan_index:
-            max_level = int(import_data["Level"][break_pos-1])
-            if verbose:
-                print("\nbreak position: %d (line %d)" % (break_pos, break_pos+2))
-                print("max_level: %d" % max_level)
-            # Reset to base level
-            ChildPart = ReportPart
-            NewParent = None
-            ref_level = int(import_data["Level"][start_pos])
-
-            for i in import_data.index[start_pos:break_pos]:
-                # Add parts to group as parents of earlier part.
-                if verbose:
-                    print("\ni: %s (line %s)" % (str(i), str(i+2)))
-                parent_num = import_data["Component number"][i]
-                parent_desc = import_data["Object description"][i]
-                this_level = int(import_data["Level"][i])
-                if verbose:
-                    print("level: %d/%d" % (this_level, max_level))
-
-                # Rudimentary data validation
-                assert len(parent_num) >= 5, ("Found less than 5 digits where "
-                                "part number should be in cell E%d of report. "
-                                   "Check formatting in %s." % (i+2, file_name))
-                assert len(parent_desc) > 0, ("Found empty cell where "
-                                   "description string should be in cell D%d. "
-                                   "Check formatting in %s." % (i+2, file_name))
-
-                # Parent-setting behavior depends on if level changed since last
-                # iteration.
-                if this_level > ref_level:
-                    # Higher level than group started at.
-                    # Use previous iteration's part as the child for this part.
-                    ChildPart = NewParent
-                elif (NewParent and this_level < max_level
-                                        and not isinstance(NewParent, Platform)):
-                    # If NewParent exists (set on previous iteration), this is
-                    # not first item in group.
-                    # This part is at same level previous part.
-                    # Keep child the same.
-                    # Set previous part as orphan.
-                    NewParent.set_orphan()
-                elif this_level > 1:
-                    # This is the first item in the group, and its level is > 1.
-                    # That means it's the parent of the last part in the lower
-                    # level - found in a preceding group.
-                    ChildPart = level_dict[this_level-1]
-                else:
-                    # For first part in group, and level 1, take no action here.
-                    pass
-                if verbose:
-                    print("ChildPart: %s" % ChildPart.__str__())
-
-                # Create and add this part to the group if not already in
-                # the Parts set.
-                if self.get_part(parent_num) == False:
-                    NewParent = Part(parent_num, name=parent_desc)
-                    if verbose:
-                        print("\tAdding %s to group" % NewParent)
-                    self.add_part(NewParent)
-                else:
-                    if verbose:
-                        print("\tPart   %s already in group" % parent_num)
-                    NewParent = self.get_part(parent_num)
-                    # If parent doesn't have name/description stored, add it now.
-                    if not NewParent.get_name():
-                        NewParent.set_name(parent_desc)
-                # Store this part as most recent for current level
-                level_dict[this_level] = NewParent
-
-                # Add this part as a parent if not already in the Parents set.
-                if ChildPart.get_parent(parent_num) == False:
-                    if verbose:
-                        print("\tAdding %s as parent of part %s" % (NewParent,
-                                                                  ChildPart))
-                    ChildPart.add_parent(NewParent)
-
-                if (this_level == max_level
-                                       and not isinstance(NewParent, Platform)):
-                    # Everything at the highest level is either an orphan or
-                    # a platform
-                    if verbose:
-                        print("\tSetting %s as orphan" % NewParent.__str__())
-                    NewParent.set_orphan()
-
-                # Set this level as reference level for next iteration
-                ref_level = this_level
-
-            start_pos = break_pos+1
 
-        print("...done")
-        # print("\nParts:\t      %r" % self.Parts) # DEBUG
-        # print("Report parts: %r" % self.report_Parts) # DEBUG
-        # print("Target parts: %r" % self.target_Parts) # DEBUG
+    def import_SAP_multi_w_report(self, import_path, verbose=False):
+        """Read in a multi-level where-used report exported from SAP CS15.
+        Structure is extracted by extract_multi_w_edges() and then added to
+        group in bulk (creating Parts objects and linking parts).
+        """
+        parsed_report = parse_report_file("SAP_multi_w", import_path,
+                                    self.get_platform_pns(), verbose=verbose,
+                                                use_cache=self.report_cache,
+                                                stream_xlsx=self.stream_xlsx)
+        if parsed_report:
+            self.import_parsed_report(parsed_report, verbose=verbose)
+            print("...done")
+        return parsed_report
 
 
     def import_SAP_multi_BOM_report_xlsx(self, import_path, verbose=False):
         """Read in a multi-level BOM exported from SAP CS12.
-        Calls parse_multilev_bom_df() to create Parts objects and link parts
+        Calls import_multilev_bom_data() to create Parts objects and link parts
         based on BOM hierarchy.
         """
-        file_name = os.path.basename(import_path)
-        report_prefix = "SAP_multi_BOM"
-        if not (file_name.startswith(report_prefix)
-                        and os.path.splitext(file_name)[-1].lower()==".xlsx"):
-            # ignore files not matching expected report pattern
-            if verbose:
-                print("Unrecognized report-name format (skipping): %s\n" % file_name)
-            return
-
-        print("\nReading data from %s..." % file_name)
-        excel_data = pd.read_excel(import_path, dtype=str, engine="openpyxl")
-        import_df = pd.DataFrame(excel_data)
-        # https://stackoverflow.com/a/41662442
-
-        pn_regex = r"(?<=^" + report_prefix + r"_)[\dA-Z]{1,40}(?=_\S*\.XLSX$|\.XLSX$)"
-        pn_matches = re.findall(pn_regex, file_name, flags=re.IGNORECASE)
-        if len(pn_matches) == 1:
-            pn = pn_matches[0]
-        else:
-            raise Exception("Can't find P/N in filename: %s" % file_name)
-
-        # Pass df to common helper function that parses structure and creates
-        # objects and relations.
-        self.parse_multilev_bom_df(import_df, pn, file_name)
+        parsed_report = parse_report_file("SAP_multi_BOM_xlsx", import_path,
+                            verbose=verbose, use_cache=self.report_cache,
+                                                stream_xlsx=self.stream_xlsx)
+        if parsed_report:
+            self.import_multilev_bom_data(parsed_report, verbose=verbose)
+        return parsed_report
 
 
     def import_SAP_multi_BOM_report_txt(self, import_path, verbose=False):
         """Read in a multi-level BOM exported from SAP CS11 process runner
         ("Level-by-Level" BOM explosion).
-        Calls parse_multilev_bom_df() to create Parts objects and link parts
+        Calls import_multilev_bom_data() to create Parts objects and link parts
         based on BOM hierarchy.
         """
-        file_name = os.path.basename(import_path)
+        parsed_report = parse_report_file("SAP_multi_BOM_text", import_path,
+                            verbose=verbose, use_cache=self.report_cache)
+        if parsed_report:
+            self.import_multilev_bom_data(parsed_report, verbose=verbose)
+        return parsed_report
 
-        filename_regex = r"^(\d{6}|\d{8})_01.txt$"
-        matches = re.findall(filename_regex, file_name, flags=re.IGNORECASE)
-        if not len(matches) == 1:
-            # ignore files not matching expected report pattern
-            if verbose:
-                print("Unrecognized report-name format (skipping): %s\n" % file_name)
-            return
-
-        file_pn_regex = r"^(\d{6}|\d{8})(?=_)"
-        pn_matches = re.findall(file_pn_regex, file_name, flags=re.IGNORECASE)
-        if len(matches) == 1:
-            pn = pn_matches[0]
-        else:
-            raise Exception("Can't find P/N in filename: %s" % file_name)
-
-        # Exclude non-AGS platforms.
-        if pn not in platforms.platform_pns_AGS_base:
-            return
-
-        # Read in table from text file
-        print("\nReading data from %s..." % file_name)
-        # Adopted functionality prototyped in SAP_text_platform_import.ipynb
-        import_df = pd.read_csv(import_path, sep=r"\s*\|\s*",
-                                skiprows=[0,1,2,3,4,5,6,7,9], header=0,
-                                engine="python", skipfooter=1)
-        # Get rid of leading and trailing blank columns
-        import_df = import_df.loc[:,~import_df.columns.str.match("Unnamed")]
-        # https://www.datasciencelearner.com/pandas/drop-unnamed-column-pandas/
-
-        # Pass df to common helper function that parses structure and creates
-        # objects and relations.
-        self.parse_multilev_bom_df(import_df, pn, file_name)
 
+    def import_parsed_report(self, parsed_report, verbose=False):
+        """Add output of one of the parse_*_report() functions to group.
+        """
+        self.import_report_data(parsed_report["report_pn"],
+                    parsed_report["report_name"], parsed_report["edges"],
+                    parsed_report["descs"], orphans=parsed_report["orphans"],
+                    report_desc=parsed_report["report_desc"], verbose=verbose)
 
     def parse_multilev_bom_df(self, import_data, part_num, filename, verbose=False):
         """
         Create Parts objects and link parts based on BOM hierarchy.
+        Structure is extracted by extract_multilev_bom_edges() and then added
+        to group in bulk.
         """
-        # Check expected fields are present
-        assert "Component number" in import_data.columns, ("Expected column "
-                                        "called 'Component number' to exist in file. "
-                                        "Check formatting in %s." % filename)
-        assert "Object description" in import_data.columns, ("Expected column "
-                                        "called 'Object description' to exist in file. "
-                                        "Check formatting in %s." % filename)
-        # Level column presence verified below.
+        edges, descs = extract_multilev_bom_edges(import_data, part_num,
+                                                    filename, verbose=verbose)
+        self.import_multilev_bom_data(make_parsed_report(part_num, filename,
+                                                edges, descs), verbose=verbose)
+
+    def import_multilev_bom_data(self, parsed_report, verbose=False):
+        """Add parsed multi-level BOM contents to group.
+        """
+        self.import_parsed_report(parsed_report, verbose=verbose)
+
+        print("...done")
+        # print("\nParts:\t      %r" % self.Parts) # DEBUG
+        print("\nPart count:\t%d" % self.get_part_count()) # DEBUG
+        # print("Report parts: %r" % self.report_Parts) # DEBUG
+        print("Target parts: %r" % self.target_Parts) # DEBUG
 
+    def import_report_data(self, report_pn, report_name, edges, descs,
+                                orphans=(), report_desc="", verbose=False):
+        """Add one report's parsed contents to group: the report part, every
+        P/N found in the report (descs dict maps P/N to description), parent
+        relationships as (child P/N, parent P/N) pairs, and P/Ns found to be
+        orphans.
+        """
         # Add report part to PartsGroup
-        if self.get_part(part_num) == False:
-            ReportPart = Part(part_num) # no description/name given
+        if self.get_part(report_pn) == False:
+            ReportPart = Part(report_pn, name=report_desc)
             if verbose:
                 print("\tAdding %s to group (report part)" % ReportPart)
             self.add_part(ReportPart)
         else:
             if verbose:
-                print("\tPart   %s already in group (report part)" % part_num)
-            ReportPart = self.get_part(part_num)
+                print("\tPart   %s already in group (report part)" % report_pn)
+            ReportPart = self.get_part(report_pn)
             assert ReportPart not in self.report_Parts, ("Found multiple "
                               "reports in import folder for %s:\n\t%s\n\t%s"
-               % (ReportPart.get_pn(), ReportPart.get_report_name(), filename))
+               % (ReportPart.get_pn(), ReportPart.get_report_name(), report_name))
+            # If part doesn't have name/description stored, add it now.
+            if not ReportPart.get_name():
+                ReportPart.set_name(report_desc)
 
-        ReportPart.set_report_name(filename)
+        ReportPart.set_report_name(report_name)
         self.report_Parts.add(ReportPart)
 
-        if verbose:
-            print(import_data.to_string(max_rows=10, max_cols=7))
-
-        # Create dictionary to store most recent part in each "level".
-        level_dict = {}
-
-        Parent = ReportPart
-        LastPart = Parent
-        previous_level = 0
-        for i in import_data.index:
-            if verbose:
-                print("\ni: %s (line %s)" % (str(i), str(i+2)))
-            part_num = import_data["Component number"][i]
-            part_desc = import_data["Object description"][i]
-            if len(part_num) < 6 and part_num.startswith("CU"):
-                # Skip "custom options"
-                continue
-
-            if "Explosion level" in import_data.columns:
-                current_level = int(import_data["Explosion level"][i].split(".")[-1])
-            elif "Level" in import_data.columns:
-                current_level = int(import_data["Level"][i].split(".")[-1])
-            elif "Lv" in import_data.columns:
-                current_level = int(import_data["Lv"][i])
-            else:
-                raise Exception("Expected an explosion-level column to exist in file. "
-                                        "Check formatting in %s." % filename)
-
-            if verbose:
-                print("level: %d" % current_level)
-
-            # Rudimentary data validation
-            assert len(part_num) >= 5, ("Found less than 5 digits where "
-                                "part number should be in row pos %d of report. "
-                                "Check formatting in %s." % (i, filename))
-            assert len(part_desc) > 0, ("Found empty cell where "
-                                "description string should be in row pos %d. "
-                                "Check formatting in %s." % (i, filename))
-
-            if current_level > previous_level:
-                if verbose:
-                    print("current_level > previous_level")
-                Parent = LastPart
-                level_dict[previous_level] = LastPart
-            elif current_level <  previous_level:
-                if verbose:
-                    print("current_level < previous_level")
-                Parent = level_dict[current_level-1]
-            else:
-                # same level; keep Parent the same.
-                pass
-
-            # Create and add this part to the group if not already in Parts set.
+        # Create and add each part to the group if not already in Parts set.
+        for part_num, part_desc in descs.items():
             if self.get_part(part_num) == False:
                 NewPart = Part(part_num, name=part_desc)
                 if verbose:
                     print("\tAdding %s to group" % NewPart)
                 self.add_part(NewPart)
             else:
-                if verbose:
-                    print("\tPart   %s already in group" % part_num)
                 NewPart = self.get_part(part_num)
-                # If parent doesn't have name/description stored, add it now.
+                # If part doesn't have name/description stored, add it now.
                 if not NewPart.get_name():
                     NewPart.set_name(part_desc)
 
+        for child_num, parent_num in edges:
+            ChildPart = self.get_part(child_num)
             # Add this parent to this part if not already in the Parents set.
-            if NewPart.get_parent(Parent.get_pn()) == False:
+            if ChildPart.get_parent(parent_num) == False:
                 if verbose:
-                    print("\tAdding %s as parent of part %s" % (Parent, NewPart))
-                NewPart.add_parent(Parent)
-
-            LastPart = NewPart
-            previous_level = current_level
+                    print("\tAdding %s as parent of part %s" % (parent_num,
+                                                                    child_num))
+                self.link_parts(ChildPart, self.get_part(parent_num))
 
-        print("...done")
-        # print("\nParts:\t      %r" % self.Parts) # DEBUG
-        print("\nPart count:\t%d" % len(self.Parts)) # DEBUG
-        # print("Report parts: %r" % self.report_Parts) # DEBUG
-        print("Target parts: %r" % self.target_Parts) # DEBUG
+        for part_num in orphans:
+            if verbose:
+                print("\tSetting %s as orphan" % part_num)
+            self.get_part(part_num).set_orphan()
 
+    def needs_report(self, Part_i):
+        """Every part should belong to one of these groups: parts w/ a report,
+        platforms, parts w/ "OBS-" prefix, or orphan parts (empty where-used).
+        Returns True if Part_i isn't in any of them yet.
+        """
+        return not (Part_i in self.report_Parts or Part_i.is_platform()
+                            or Part_i.get_obs_disp() or Part_i.is_orphan())
 
     def find_missing_reports(self):
         """Used when importing individual where-used reports to find what reports are
         needed but not contained in import folder.
-        Runs recursively after each new report is added.
+        Repeats after each new report is added. Only new or changed files are
+        read in, and only parts in those reports are checked in addition to
+        the ones still missing a report.
         """
-        while True:
-            # Every part should belong to one of these groups: parts w/ a report,
-            # platforms, parts w/ "OBS-" prefix, or orphan parts (empty where-used).
-            platform_parts = self.get_platforms()
-            # Now exclude the platform parts from the search for parts w/ "OBS-"
-            obs_parts = set({Part_i for Part_i
-                                        in self.Parts.difference(platform_parts)
-                                                    if Part_i.get_obs_disp()})
-            orphan_parts = set({Part_i for Part_i
-                            in self.Parts.difference(platform_parts, obs_parts)
-                                                        if Part_i.is_orphan()})
-
-            union_set = self.report_Parts.union(platform_parts, obs_parts,
-                                                                  orphan_parts)
-            tbd_parts = self.Parts.difference(union_set)
-            if len(tbd_parts) > 0:
-                print("\nMissing a report or orphan status for these parts:")
-                for Part_i in tbd_parts:
-                    print("\t%s" % Part_i)
-                for Part_i in tbd_parts:
-                    print("%s: Press Enter after adding missing report to import "
-                           "or press 'n' if where-used report was empty." % Part_i)
-                    answer = input("> ")
-                    if answer.lower() == "n":
-                        Part_i.set_orphan()
-                        orphan_parts.add(Part_i)
-                    else:
-                        self.import_all_reports(find_missing=False)
-                        # uses original report type.
-                        break # re-generate sets
+        tbd_parts = set(filter(self.needs_report, self.get_parts()))
+        while len(tbd_parts) > 0:
+            print("\nMissing a report or orphan status for these parts:")
+            for Part_i in tbd_parts:
+                print("\t%s" % Part_i)
+            for Part_i in list(tbd_parts):
+                print("%s: Press Enter after adding missing report to import "
+                       "or press 'n' if where-used report was empty." % Part_i)
+                answer = input("> ")
+                if answer.lower() == "n":
+                    Part_i.set_orphan()
+                    tbd_parts.discard(Part_i)
+                else:
+                    # uses original report type.
+                    touched_Parts = self.import_new_reports()
+                    tbd_parts = set(filter(self.needs_report,
+                                                tbd_parts.union(touched_Parts)))
+                    break # re-generate sets
+
+
+    def get_snapshot_data(self):
+        """Return group's imported state as plain data: tables indexed by node
+        number (position in "pns") and links as packed arrays of node numbers.
+        Target parts aren't included (read from txt file by each mode).
+        """
+        Parts_list = list(self.Parts.values())
+        node_ids = {Part_i.get_pn(): node_id
+                                for node_id, Part_i in enumerate(Parts_list)}
+        edge_children = array("i")
+        edge_parents = array("i")
+        for node_id, Part_i in enumerate(Parts_list):
+            for parent_num in Part_i.Parents:
+                edge_children.append(node_id)
+                edge_parents.append(node_ids[parent_num])
+
+        return {"snapshot_version": SNAPSHOT_VERSION,
+            "report_type": self.report_type,
+            "eff_date_str": self.eff_date_str,
+            "parser_version": REPORT_PARSER_VERSION,
+            "AGS_platforms": tuple(sorted(platforms.platform_pns_AGS_base)),
+            "file_fingerprints": self.get_file_fingerprints(),
+            "pns": [Part_i.get_pn() for Part_i in Parts_list],
+            "names": [Part_i.get_name() for Part_i in Parts_list],
+            "orphan": bytes(Part_i.is_orphan() for Part_i in Parts_list),
+            "platform_obs": {node_id: Part_i.get_obs_status()
+                                for node_id, Part_i in enumerate(Parts_list)
+                                                    if Part_i.is_platform()},
+            "report_names": {node_id: Part_i.get_report_name()
+                                for node_id, Part_i in enumerate(Parts_list)
+                                            if Part_i.get_report_name()},
+            "report_ids": [node_ids[ReportPart.get_pn()]
+                                        for ReportPart in self.report_Parts],
+            "edge_children": edge_children.tobytes(),
+            "edge_parents": edge_parents.tobytes()}
+
+    def get_file_fingerprints(self):
+        """Return dict of fingerprint (see get_file_fingerprint()) of every
+        file read in from import folder, keyed by path.
+        """
+        return {import_path: file_record["fingerprint"]
+                for import_path, file_record in self.imported_files.items()}
+
+    def restore_snapshot_data(self, snapshot):
+        """Replace group's parts, links and report info w/ output of
+        get_snapshot_data().
+        """
+        # Creating lots of small objects at once triggers repeated (pointless)
+        # garbage-collection passes. Suspend during rebuild.
+        # https://docs.python.org/3/library/gc.html#gc.disable
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self.restore_parts(snapshot)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        self.report_type = snapshot["report_type"]
+        self.eff_date_str = snapshot["eff_date_str"]
+        self.ancestor_cache = {}
+        self.topo_order = None
+        self.obs_status = None
+        self.platform_bits = None
+
+    def restore_parts(self, snapshot):
+        """Rebuild Part objects and links from snapshot data.
+        """
+        self.Parts = {}
+        self.Platforms = {}
+        Parts_list = []
+        for node_id, part_num in enumerate(snapshot["pns"]):
+            name = snapshot["names"][node_id]
+            if node_id in snapshot["platform_obs"]:
+                Part_i = Platform(part_num, name,
+                                            snapshot["platform_obs"][node_id])
             else:
-                break
+                Part_i = Part(part_num, name=name)
+            if snapshot["orphan"][node_id]:
+                Part_i.set_orphan()
+            if node_id in snapshot["report_names"]:
+                Part_i.set_report_name(snapshot["report_names"][node_id])
+            self.add_part(Part_i)
+            Parts_list.append(Part_i)
+
+        edge_children = array("i", snapshot["edge_children"])
+        edge_parents = array("i", snapshot["edge_parents"])
+        for child_id, parent_id in zip(edge_children, edge_parents):
+            # Group is new, so no cached ancestors to invalidate.
+            Parts_list[child_id].add_parent(Parts_list[parent_id])
+
+        self.report_Parts = set({Parts_list[node_id]
+                                        for node_id in snapshot["report_ids"]})
+
+    def save_snapshot(self, snapshot_path):
+        """Write whole group (see get_snapshot_data()) to a single binary file.
+        """
+        print("\nSaving snapshot to %s..." % snapshot_path, end="")
+        write_pickle(snapshot_path, self.get_snapshot_data())
+        print("done")
 
+    def load_snapshot(self, snapshot_path, report_type=None, eff_date_str=None,
+                                                            import_dir=None):
+        """Replace group contents w/ snapshot saved by save_snapshot().
+        If report_type or eff_date_str are given, snapshot is only used if it
+        matches them. Snapshot is also skipped if its platforms (P/N and can-obs
+        status) differ from the platforms currently in group, or if it was
+        parsed by a different REPORT_PARSER_VERSION or AGS platform list.
+        If import_dir is given, files in it must be the same (path, size and
+        mod. time) as the ones snapshot was built from.
+        Returns True if snapshot was loaded.
+        """
+        if not os.path.isfile(snapshot_path):
+            return False
+        print("Reading snapshot from %s..." % snapshot_path, end="")
+        try:
+            with open(snapshot_path, "rb") as snapshot_file:
+                snapshot = pickle.load(snapshot_file)
+        except Exception as err:
+            print("\nCan't read snapshot (%s). Re-importing reports." % err)
+            return False
+
+        if snapshot.get("snapshot_version") != SNAPSHOT_VERSION:
+            print("\nSnapshot is in an old format. Re-importing reports.")
+            return False
+
+        current_platforms = {Platform_i.get_pn(): Platform_i.get_obs_status()
+                                        for Platform_i in self.get_platforms()}
+        snapshot_platforms = {snapshot["pns"][node_id]: can_obs
+                        for node_id, can_obs in snapshot["platform_obs"].items()}
+        if report_type and snapshot["report_type"] != report_type:
+            mismatch = "report type %s" % snapshot["report_type"]
+        elif eff_date_str and snapshot["eff_date_str"] != eff_date_str:
+            mismatch = "built from %s exports" % snapshot["eff_date_str"]
+        elif current_platforms and snapshot_platforms != current_platforms:
+            mismatch = "platform list changed"
+        elif snapshot["parser_version"] != REPORT_PARSER_VERSION:
+            mismatch = "report parser changed"
+        elif snapshot["AGS_platforms"] != tuple(sorted(
+                                            platforms.platform_pns_AGS_base)):
+            mismatch = "AGS platform list changed"
+        else:
+            mismatch = None
+        if not mismatch and import_dir:
+            self.import_dir = import_dir
+            if snapshot["file_fingerprints"] != {import_path:
+                                        self.get_file_fingerprint(import_path)
+                                for import_path in self.get_import_paths()}:
+                mismatch = "files in import folder changed"
+        if mismatch:
+            print("\nSnapshot out of date (%s). Re-importing reports." % mismatch)
+            return False
+
+        self.restore_snapshot_data(snapshot)
+        self.imported_files = {import_path: {"fingerprint": fingerprint,
+                                                            "report": None}
+                for import_path, fingerprint in snapshot["file_fingerprints"].items()}
+        print("done")
+        print("Part count:\t%d" % self.get_part_count())
+        return True
 
     def present_remote_export_date(self):
         pass
 
+    def iter_parts_rows(self, Parts_iter, platform_app=False):
+        """Generator that yields a (P/N, description, can-obs flag, platform
+        P/N list) row per part. Flag (True if every platform part is used on
+        can be obsoleted) and platform list are only looked up if
+        platform_app is True; otherwise they're None.
+        """
+        for Part_i in Parts_iter:
+            if platform_app:
+                Platforms_list, obs_det = self.get_platform_app(Part_i)
+                yield (Part_i.get_pn(), Part_i.get_name(), obs_det,
+                                                list(map(str, Platforms_list)))
+            else:
+                yield Part_i.get_pn(), Part_i.get_name(), None, None
+
     def export_parts_set(self, pn_set=None, omit_platforms=False,
-                                                            platform_app=False):
-        """Output CSV file with part numbers and descriptions.
+                                    platform_app=False, export_format="csv"):
+        """Output file with part numbers and descriptions (and platform
+        applications if platform_app is True).
         Default is to export all parts in group. Can use pn_set to pass in the
         specific parts set desired.
+        export_format is "csv", or "parquet"/"feather" for a typed columnar
+        file (pn, description, can_obs, platforms list) that pandas can load
+        directly (see write_parts_columns()).
         """
+        assert export_format in PARTS_EXPORT_FORMATS, ("Export format must be "
+                                "one of %s" % ", ".join(PARTS_EXPORT_FORMATS))
         timestamp = datetime.now().strftime(DATETIME_FORMAT)
-        export_path = os.path.join(EXPORT_DIR, "%s_%s_parts_set.csv"
-                                  % (timestamp, self.get_pn_string(max_len=31)))
+        export_path = os.path.join(EXPORT_DIR, "%s_%s_parts_set.%s"
+                                  % (timestamp, self.get_pn_string(max_len=31),
+                                                                export_format))
 
         if pn_set == None:
-            parts_list = list(self.get_parts(omit_platforms))
-        else:
-            parts_list = list(pn_set)
+            pn_set = self.get_parts(omit_platforms)
+        # Rows are generated as they're written.
+        part_rows = self.iter_parts_rows(pn_set, platform_app)
+
+        print("\nWriting combined data to %s..." % os.path.basename(export_path), end="")
+        if export_format != "csv":
+            write_parts_columns(part_rows, export_path, export_format)
+            print("done")
+            return
 
         # Create new CSV file and write out.
         with open(export_path, 'w+') as output_file:
             output_file_csv = csv.writer(output_file, dialect="excel")
-
-            print("\nWriting combined data to %s..." % os.path.basename(export_path), end="")
-            for part in parts_list:
+            for part_num, part_name, obs_det, platform_list in part_rows:
                 if platform_app:
-                    platform_set = part.get_platform_refs()
-                    platform_list = list(map(str, platform_set))
-                    platform_list.sort()
-                    obs_det = False not in [platform.get_obs_status() for platform in platform_set]
-                    output_file_csv.writerow([part.get_pn(), part.get_name()] +
+                    output_file_csv.writerow([part_num, part_name] +
                                  ["-", obs_det, "Platforms: "] + platform_list)
                 else:
-                    output_file_csv.writerow([part.get_pn(), part.get_name()])
-            print("done")
+                    output_file_csv.writerow([part_num, part_name])
+        print("done")
+
 
+    def export_union_boms(self, union_boms, per_target=False,
+                                                        omit_platforms=True):
+        """Output union BOMs from get_union_boms() to CSV. Default is one
+        long-format file w/ a row per target part and BOM member (target P/N,
+        P/N, description). If per_target is True, writes one file per target
+        part instead (same layout as export_parts_set()).
+        """
+        timestamp = datetime.now().strftime(DATETIME_FORMAT)
+        bom_lists = [(TargetPart, sorted(Part_i
+                                for Part_i in union_boms[TargetPart]
+                                if not (omit_platforms and Part_i.is_platform())))
+                                        for TargetPart in sorted(union_boms)]
+
+        if per_target:
+            print("\nWriting union BOMs for %d target parts to %s folder..."
+                    % (len(bom_lists), os.path.basename(EXPORT_DIR)), end="")
+            for TargetPart, parts_list in bom_lists:
+                export_path = os.path.join(EXPORT_DIR, "%s_%s_union_bom.csv"
+                                                    % (timestamp, TargetPart))
+                with open(export_path, 'w+') as output_file:
+                    output_file_csv = csv.writer(output_file, dialect="excel")
+                    for Part_i in parts_list:
+                        output_file_csv.writerow([Part_i.get_pn(),
+                                                            Part_i.get_name()])
+        else:
+            export_path = os.path.join(EXPORT_DIR, "%s_%d_union_boms.csv"
+                                                % (timestamp, len(bom_lists)))
+            print("\nWriting union BOMs for %d target parts to %s..."
+                    % (len(bom_lists), os.path.basename(export_path)), end="")
+            with open(export_path, 'w+') as output_file:
+                output_file_csv = csv.writer(output_file, dialect="excel")
+                for TargetPart, parts_list in bom_lists:
+                    for Part_i in parts_list:
+                        output_file_csv.writerow([TargetPart.get_pn(),
+                                            Part_i.get_pn(), Part_i.get_name()])
+        print("done")
 
     def get_pn_string(self, pn_set_spec=False, max_len=40):
         """Generate string to represent P/N group for export filenames.
@@ -1077,7 +2427,521 @@ class PartGroup(object):
 
 
     def __repr__(self):
-        return "PartsGroup object: %s" % str(self.Parts)
+        return "PartsGroup object: %s" % str(self.get_parts())
+
+
+class CompactPart(object):
+    """Lightweight stand-in for a Part stored in a CompactPartGroup.
+    Holds only the group and the part's integer node ID; P/N, name, flags and
+    BOM links all live in the group's tables and arrays. Instances are created
+    on demand, so two instances w/ the same node ID compare equal.
+    Offers the same methods as Part for use by export and graph code.
+    """
+    __slots__ = ("Group", "node_id")
+
+    def __init__(self, Group, node_id):
+        self.Group = Group
+        self.node_id = node_id
+
+    @property
+    def part_num(self):
+        return self.Group.pn_list[self.node_id]
+
+    @property
+    def report_name(self):
+        return self.Group.report_names.get(self.node_id)
+
+    def set_report_name(self, report_name):
+        self.Group.report_names[self.node_id] = report_name
+
+    def get_report_name(self):
+        return self.report_name
+
+    # Same suffix logic as Part (only uses part_num and report_name).
+    get_report_suffix = Part.get_report_suffix
+
+    def get_obs_disp(self):
+        return bool(self.Group.obs_disp[self.node_id])
+
+    def get_obs_status(self, silent=False):
+        return self.Group.get_obs_status(self)
+
+    def set_orphan(self):
+        self.Group.orphan[self.node_id] = 1
+
+    def is_orphan(self):
+        return bool(self.Group.orphan[self.node_id])
+
+    def is_platform(self):
+        return False
+
+    def get_parent(self, parent_num):
+        parent_id = self.Group.pn_index.get(parent_num)
+        if (parent_id is not None
+                and parent_id in self.Group.get_parent_ids(self.node_id)):
+            return self.Group.get_part_by_id(parent_id)
+        return False # only happens if no match found.
+
+    def get_parents(self):
+        return set(map(self.Group.get_part_by_id,
+                                    self.Group.get_parent_ids(self.node_id)))
+
+    def get_children(self):
+        return set(map(self.Group.get_part_by_id,
+                                    self.Group.get_child_ids(self.node_id)))
+
+    def get_pn(self):
+        return self.part_num
+
+    def set_name(self, desc):
+        self.Group.names[self.node_id] = desc
+
+    def get_name(self):
+        return self.Group.names[self.node_id]
+
+    def __eq__(self, other):
+        return (isinstance(other, CompactPart) and other.Group is self.Group
+                                            and other.node_id == self.node_id)
+
+    def __hash__(self):
+        return hash(self.node_id)
+
+    def __lt__(self, other):
+        return self.__str__() < other.__str__()
+
+    def __str__(self):
+        return self.part_num
+
+    def __repr__(self):
+        return "Part object: %s" % self.part_num
+
+
+class CompactPlatform(CompactPart):
+    """CompactPart stand-in for a platform.
+    """
+    __slots__ = ()
+
+    def get_obs_status(self, silent=False):
+        return self.Group.platform_obs[self.node_id]
+
+    def is_platform(self):
+        return True
+
+    def __repr__(self):
+        return "Platform object: %s" % self.part_num
+
+
+class CompactPartGroup(PartGroup):
+    """Array-backed alternative to PartGroup for very large imports (e.g.
+    every platform's CS11 explosion at once).
+    Each P/N is interned once and given an integer node ID. Names and flags
+    are kept in flat per-ID tables, and BOM links are buffered as pairs of
+    node IDs, then packed into NumPy CSR (compressed sparse row) arrays for
+    parent and child lookups. Traversals run over those arrays.
+    No Part objects are stored; get_part() and friends return CompactPart
+    facades. Only multi-level report types (BOM and where-used) are
+    supported.
+    """
+    def __init__(self, import_workers=1, report_cache=True, snapshot_path=None,
+                                                            stream_xlsx=False):
+        PartGroup.__init__(self, import_workers=import_workers,
+                    report_cache=report_cache, snapshot_path=snapshot_path,
+                                                    stream_xlsx=stream_xlsx)
+        # PartGroup's object registries aren't used.
+        self.Parts = None
+        self.Platforms = None
+
+        # Interned P/N table and per-node-ID tables.
+        self.pn_index = {}              # P/N -> node ID
+        self.pn_list = []               # node ID -> P/N
+        self.names = []                 # node ID -> name/description
+        self.obs_disp = bytearray()     # node ID -> 1 if "OBS-" prefix
+        self.orphan = bytearray()       # node ID -> 1 if orphan
+        self.platform_obs = {}          # node ID -> can_obs (platforms only)
+        self.report_names = {}          # node ID -> report filename
+
+        # BOM links as parallel arrays of node IDs (child, parent). May contain
+        # duplicates until packed by build_arrays().
+        self.edge_children = array("i")
+        self.edge_parents = array("i")
+
+        # CSR arrays. Parents of node n are
+        # parent_idx[parent_ptr[n]:parent_ptr[n+1]], and likewise for children.
+        # Set to None whenever parts or links are added.
+        self.parent_ptr = None
+        self.parent_idx = None
+        self.child_ptr = None
+        self.child_idx = None
+        self.platform_mask = None
+        self.platform_can_obs = None
+
+    def intern_part(self, part_num, name=""):
+        """Return node ID for P/N, adding it to tables if not already present.
+        """
+        node_id = self.pn_index.get(part_num)
+        if node_id is None:
+            node_id = len(self.pn_list)
+            self.pn_index[part_num] = node_id
+            self.pn_list.append(part_num)
+            self.names.append(name)
+            self.obs_disp.append(has_obs_prefix(name))
+            self.orphan.append(0)
+            self.parent_ptr = None
+            self.obs_status = None
+            self.platform_bits = None
+        return node_id
+
+    def get_part_by_id(self, node_id):
+        if node_id in self.platform_obs:
+            return CompactPlatform(self, node_id)
+        return CompactPart(self, node_id)
+
+    def add_part(self, Part_i):
+        """Add a Part/Platform object's data to the tables. The object itself
+        isn't kept.
+        """
+        if self.has_part(Part_i):
+            return
+        node_id = self.intern_part(Part_i.get_pn(), Part_i.get_name())
+        if Part_i.is_platform():
+            self.platform_obs[node_id] = Part_i.get_obs_status()
+        if Part_i.is_orphan():
+            self.orphan[node_id] = 1
+        if Part_i.get_report_name():
+            self.report_names[node_id] = Part_i.get_report_name()
+
+    def get_part(self, part_num):
+        node_id = self.pn_index.get(part_num)
+        if node_id is None:
+            return False # only happens if no match found.
+        return self.get_part_by_id(node_id)
+
+    def get_part_count(self):
+        return len(self.pn_list)
+
+    def has_part(self, Part_i):
+        return isinstance(Part_i, CompactPart) and Part_i.Group is self
+
+    def get_parts(self, omit_platforms=False):
+        return set({self.get_part_by_id(node_id)
+                                    for node_id in range(len(self.pn_list))
+                    if not (omit_platforms and node_id in self.platform_obs)})
+
+    def get_platforms(self):
+        return set(map(self.get_part_by_id, self.platform_obs))
+
+    def get_platform_pns(self):
+        return set({self.pn_list[node_id] for node_id in self.platform_obs})
+
+    def link_parts(self, ChildPart, ParentPart):
+        self.edge_children.append(self.intern_part(ChildPart.get_pn()))
+        self.edge_parents.append(self.intern_part(ParentPart.get_pn()))
+        self.parent_ptr = None
+        self.obs_status = None
+        self.platform_bits = None
+
+    def import_all_reports(self, report_type=None, find_missing=True,
+                                                           import_subdir=None):
+        assert (report_type or self.report_type).startswith("SAP_multi"), (
+                    "Compact part group only supports multi-level reports.")
+        PartGroup.import_all_reports(self, report_type=report_type,
+                        find_missing=find_missing, import_subdir=import_subdir)
+
+    def import_target_parts(self, parts_update=True):
+        PartGroup.import_target_parts(self, parts_update=parts_update)
+        if parts_update:
+            # Target Part objects aren't kept once added. Use facades instead.
+            self.target_Parts = set({self.get_part(TargetPart.get_pn())
+                                        for TargetPart in self.target_Parts})
+
+    def import_report_data(self, report_pn, report_name, edges, descs,
+                                orphans=(), report_desc="", verbose=False):
+        """Same as PartGroup.import_report_data(), but only fills in tables
+        and link arrays.
+        """
+        report_id = self.intern_part(report_pn, report_desc)
+        ReportPart = self.get_part_by_id(report_id)
+        assert ReportPart not in self.report_Parts, ("Found multiple "
+                          "reports in import folder for %s:\n\t%s\n\t%s"
+           % (report_pn, ReportPart.get_report_name(), report_name))
+        if not self.names[report_id]:
+            self.names[report_id] = report_desc
+        self.report_names[report_id] = report_name
+        self.report_Parts.add(ReportPart)
+
+        for part_num, part_desc in descs.items():
+            node_id = self.intern_part(part_num, part_desc)
+            if not self.names[node_id]:
+                self.names[node_id] = part_desc
+
+        for child_num, parent_num in edges:
+            self.edge_children.append(self.pn_index[child_num])
+            self.edge_parents.append(self.pn_index[parent_num])
+        self.parent_ptr = None
+        self.obs_status = None
+        self.platform_bits = None
+
+        for part_num in orphans:
+            self.orphan[self.pn_index[part_num]] = 1
+        if verbose:
+            print("\tAdded %d links from %s" % (len(edges), report_name))
+
+    def get_snapshot_data(self):
+        """Same as PartGroup.get_snapshot_data(). Node numbers are node IDs, so
+        tables and (de-duplicated) link buffers are copied as-is.
+        """
+        self.build_arrays()
+        return {"snapshot_version": SNAPSHOT_VERSION,
+            "report_type": self.report_type,
+            "eff_date_str": self.eff_date_str,
+            "parser_version": REPORT_PARSER_VERSION,
+            "AGS_platforms": tuple(sorted(platforms.platform_pns_AGS_base)),
+            "file_fingerprints": self.get_file_fingerprints(),
+            "pns": list(self.pn_list),
+            "names": list(self.names),
+            "orphan": bytes(self.orphan),
+            "platform_obs": dict(self.platform_obs),
+            "report_names": dict(self.report_names),
+            "report_ids": [ReportPart.node_id
+                                        for ReportPart in self.report_Parts],
+            "edge_children": self.edge_children.tobytes(),
+            "edge_parents": self.edge_parents.tobytes()}
+
+    def restore_snapshot_data(self, snapshot):
+        self.pn_list = list(snapshot["pns"])
+        self.pn_index = {part_num: node_id
+                                for node_id, part_num in enumerate(self.pn_list)}
+        self.names = list(snapshot["names"])
+        self.obs_disp = bytearray(map(has_obs_prefix, self.names))
+        self.orphan = bytearray(snapshot["orphan"])
+        self.platform_obs = dict(snapshot["platform_obs"])
+        self.report_names = dict(snapshot["report_names"])
+        self.edge_children = array("i", snapshot["edge_children"])
+        self.edge_parents = array("i", snapshot["edge_parents"])
+        self.parent_ptr = None
+
+        self.report_Parts = set(map(self.get_part_by_id, snapshot["report_ids"]))
+        self.report_type = snapshot["report_type"]
+        self.eff_date_str = snapshot["eff_date_str"]
+        self.topo_order = None
+        self.obs_status = None
+        self.platform_bits = None
+
+    def build_arrays(self):
+        """Pack buffered links into de-duplicated CSR arrays (if not current).
+        """
+        if self.parent_ptr is not None:
+            return
+        node_count = len(self.pn_list)
+        children = np.frombuffer(self.edge_children, dtype=np.int32).astype(np.int64)
+        parents = np.frombuffer(self.edge_parents, dtype=np.int32).astype(np.int64)
+
+        # Sorting on combined key de-duplicates links and orders them by child.
+        edge_keys = np.unique(children * node_count + parents)
+        children = (edge_keys // node_count).astype(np.int32)
+        parents = (edge_keys % node_count).astype(np.int32)
+        # Keep only the de-duplicated links in the buffers.
+        self.edge_children = array("i", children.tobytes())
+        self.edge_parents = array("i", parents.tobytes())
+
+        self.parent_idx = parents
+        self.parent_ptr = np.zeros(node_count+1, dtype=np.int64)
+        np.cumsum(np.bincount(children, minlength=node_count),
+                                                    out=self.parent_ptr[1:])
+
+        by_parent = np.argsort(parents, kind="stable")
+        self.child_idx = children[by_parent]
+        self.child_ptr = np.zeros(node_count+1, dtype=np.int64)
+        np.cumsum(np.bincount(parents, minlength=node_count),
+                                                    out=self.child_ptr[1:])
+
+        self.platform_mask = np.zeros(node_count, dtype=bool)
+        self.platform_can_obs = np.zeros(node_count, dtype=bool)
+        for node_id, platform_obs in self.platform_obs.items():
+            self.platform_mask[node_id] = True
+            self.platform_can_obs[node_id] = platform_obs
+
+    def get_parent_ids(self, node_id):
+        self.build_arrays()
+        return self.parent_idx[self.parent_ptr[node_id]:self.parent_ptr[node_id+1]]
+
+    def get_child_ids(self, node_id):
+        self.build_arrays()
+        return self.child_idx[self.child_ptr[node_id]:self.child_ptr[node_id+1]]
+
+    @staticmethod
+    def gather_links(link_ptr, link_idx, node_ids):
+        """Return concatenated CSR rows for each node ID, along w/ the length of
+        each node's row.
+        """
+        starts = link_ptr[node_ids]
+        row_lens = link_ptr[node_ids+1] - starts
+        # Position of every link in link_idx, built w/o a Python-level loop.
+        positions = (np.repeat(starts - np.cumsum(row_lens) + row_lens, row_lens)
+                                                + np.arange(row_lens.sum()))
+        return link_idx[positions], row_lens
+
+    def walk_ids(self, link_ptr, link_idx, start_ids):
+        """Breadth-first walk over CSR links from start_ids. Returns sorted
+        array of node IDs reached (not including start_ids unless reached
+        again). Like PartGroup, doesn't continue through platforms.
+        """
+        self.build_arrays()
+        reached = np.zeros(len(self.pn_list), dtype=bool)
+        frontier = np.unique(np.asarray(start_ids, dtype=np.int64))
+        while frontier.size:
+            next_ids, _ = self.gather_links(link_ptr, link_idx, frontier)
+            next_ids = np.unique(next_ids[~reached[next_ids]])
+            reached[next_ids] = True
+            frontier = next_ids[~self.platform_mask[next_ids]]
+        return np.flatnonzero(reached)
+
+    def get_ancestors(self, Part_i):
+        self.build_arrays()
+        return frozenset(map(self.get_part_by_id, self.walk_ids(
+                            self.parent_ptr, self.parent_idx, [Part_i.node_id])))
+
+    def get_descendants(self, Parts_set):
+        self.build_arrays()
+        start_ids = [Part_i.node_id for Part_i in Parts_set]
+        return set(map(self.get_part_by_id, self.walk_ids(
+                                self.child_ptr, self.child_idx, start_ids)))
+
+    def get_union_boms(self, Targets_set):
+        """Same as PartGroup.get_union_boms(), but walks node IDs.
+        """
+        self.build_arrays()
+        child_ptr = self.child_ptr
+        child_idx = self.child_idx
+        id_boms = collect_union_boms(
+                    [TargetPart.node_id for TargetPart in Targets_set],
+                    lambda node_id: child_idx[child_ptr[node_id]:
+                                                child_ptr[node_id+1]].tolist(),
+                    self.platform_obs.__contains__)
+        return {self.get_part_by_id(node_id): set(map(self.get_part_by_id,
+                        id_bom)) for node_id, id_bom in id_boms.items()}
+
+    def get_topo_id_waves(self):
+        """Yield arrays of node IDs in topological waves: every node comes in a
+        later wave than all of its parents. Nodes caught in a circular BOM are
+        yielded together in a final wave.
+        """
+        self.build_arrays()
+        node_count = len(self.pn_list)
+        parent_counts = np.diff(self.parent_ptr)
+        done = np.zeros(node_count, dtype=bool)
+        frontier = np.flatnonzero(parent_counts == 0)
+        while frontier.size:
+            done[frontier] = True
+            yield frontier
+            children, _ = self.gather_links(self.child_ptr, self.child_idx,
+                                                                    frontier)
+            parent_counts = parent_counts - np.bincount(children,
+                                                        minlength=node_count)
+            frontier = np.flatnonzero((parent_counts == 0) & ~done)
+        if not done.all():
+            yield np.flatnonzero(~done)
+
+    def get_topo_order(self):
+        return [self.get_part_by_id(node_id)
+                    for wave in self.get_topo_id_waves() for node_id in wave]
+
+    def evaluate_obs_status(self):
+        """Same rules as PartGroup.evaluate_obs_status(), evaluated one
+        topological wave at a time over the CSR arrays. Stores a boolean array
+        indexed by node ID.
+        """
+        self.build_arrays()
+        node_count = len(self.pn_list)
+        can_obs = np.ones(node_count, dtype=bool)
+        obs_disp = np.frombuffer(bytes(self.obs_disp), dtype=np.uint8).astype(bool)
+        done = np.zeros(node_count, dtype=bool)
+        for wave in self.get_topo_id_waves():
+            parents, row_lens = self.gather_links(self.parent_ptr,
+                                                        self.parent_idx, wave)
+            row_nums = np.repeat(np.arange(wave.size), row_lens)
+            # Parents are all done unless this is the final wave of parts
+            # caught in (or below) a circular BOM. Those start out True and
+            # are repeated until none change (values only go to False).
+            wave_obs = None
+            while wave_obs is None or not np.array_equal(wave_obs,
+                                                            can_obs[wave]):
+                wave_obs = can_obs[wave]
+                # Count parents in each row that can't be obsoleted.
+                blocking = np.bincount(row_nums, weights=~can_obs[parents],
+                                                        minlength=wave.size)
+                can_obs[wave] = np.where(self.platform_mask[wave],
+                                            self.platform_can_obs[wave],
+                                            (blocking == 0) | obs_disp[wave])
+                if done[parents].all():
+                    break
+            done[wave] = True
+        self.obs_status = can_obs
+        return self.obs_status
+
+    def get_obs_status(self, Part_i):
+        if not self.has_part(Part_i):
+            # Part not in group (e.g. target part not found in reports).
+            return Part_i.get_obs_status(silent=True)
+        if self.obs_status is None:
+            self.evaluate_obs_status()
+        return bool(self.obs_status[Part_i.node_id])
+
+    def evaluate_platform_bits(self):
+        """Same as PartGroup.evaluate_platform_bits(), evaluated one
+        topological wave at a time over the CSR arrays. Stores a 2D array of
+        packed bits w/ a row per node ID. platform_bit_list holds node IDs.
+        """
+        self.build_arrays()
+        node_count = len(self.pn_list)
+        self.platform_bit_list = sorted(self.platform_obs,
+                                        key=self.pn_list.__getitem__)
+        platform_count = len(self.platform_bit_list)
+        # Row each platform passes down to its children (only its own bit).
+        # Packed directly (same big-endian bit order as np.packbits()), so no
+        # node x platform byte matrix is allocated.
+        bit_nums = np.arange(platform_count)
+        own_bits = np.zeros((node_count, (platform_count + 7) // 8),
+                                                            dtype=np.uint8)
+        own_bits[self.platform_bit_list, bit_nums // 8] = (
+                            1 << (7 - bit_nums % 8)).astype(np.uint8)
+        self.platform_obs_bits = np.packbits(
+                                self.platform_can_obs[self.platform_bit_list])
+
+        platform_bits = np.zeros_like(own_bits)
+        done = np.zeros(node_count, dtype=bool)
+        for wave in self.get_topo_id_waves():
+            parents, row_lens = self.gather_links(self.parent_ptr,
+                                                        self.parent_idx, wave)
+            row_ids = np.repeat(wave, row_lens)
+            # Parents are all done unless this is the final wave of parts
+            # caught in (or below) a circular BOM. Those are repeated until
+            # none of their rows change.
+            wave_bits = None
+            while wave_bits is None or not np.array_equal(wave_bits,
+                                                        platform_bits[wave]):
+                wave_bits = platform_bits[wave]
+                parent_bits = np.where(self.platform_mask[parents, np.newaxis],
+                                        own_bits[parents], platform_bits[parents])
+                np.bitwise_or.at(platform_bits, row_ids, parent_bits)
+                if done[parents].all():
+                    break
+            done[wave] = True
+        self.platform_bits = platform_bits
+        return self.platform_bits
+
+    def get_platform_refs(self, Part_i):
+        return set(self.get_platform_app(Part_i)[0])
+
+    def get_platform_app(self, Part_i):
+        if self.platform_bits is None:
+            self.evaluate_platform_bits()
+        part_bits = self.platform_bits[Part_i.node_id]
+        platform_ids = [self.platform_bit_list[bit_num] for bit_num in
+                np.flatnonzero(np.unpackbits(part_bits,
+                                        count=len(self.platform_bit_list)))]
+        return (list(map(self.get_part_by_id, platform_ids)),
+                        not (part_bits & ~self.platform_obs_bits).any())
 
 
 class TreeGraph(object):
@@ -1087,14 +2951,37 @@ class TreeGraph(object):
     of the tree (base parts; can't be mods and assys).
     """
     def __init__(self, PartsGr, target_group_only=False, printout=False,
-                                        exclude_desc=False, exclude_obs=True):
+                                        exclude_desc=False, exclude_obs=True,
+                            Targets_set=None, Parts_scope=None, graph_name=None,
+                                    max_depth=None, max_fanout=None,
+                                    node_budget=None, sfdp_threshold=None):
+        """Targets_set overrides group's target parts (e.g. to graph a single
+        target part). If Parts_scope set is given, only parts in it are
+        graphed. graph_name is used in export filename in place of target
+        P/Ns.
+        Level-of-detail limits (None for no limit): parents more than
+        max_depth levels above starting parts, parents past the first
+        max_fanout of a part, and anything that would put graph over
+        node_budget nodes are collapsed into summary nodes (count of parts
+        above and how many can't be obsoleted). Past sfdp_threshold nodes,
+        graph is laid out w/ sfdp (much faster than dot on large graphs).
+        """
         # https://graphviz.org/doc/info/attrs.html
         # https://graphviz.org/doc/info/shapes.html
         # https://graphviz.org/doc/info/colors.html
         self.PartsGr = PartsGr
         self.target_group_only = target_group_only
+        if Targets_set is None:
+            Targets_set = PartsGr.get_target_parts()
+        self.Targets_set = Targets_set
+        self.Parts_scope = Parts_scope
+        self.graph_name = graph_name
         self.exclude_desc = exclude_desc
         self.exclude_obs = exclude_obs
+        self.max_depth = max_depth
+        self.max_fanout = max_fanout
+        self.node_budget = node_budget
+        self.sfdp_threshold = sfdp_threshold
 
         if printout:
             self.back_color = "white"
@@ -1110,89 +2997,188 @@ class TreeGraph(object):
         # Get username and datestamp to include on graph.
         username = getpass.getuser()
         self.timestamp = datetime.now().strftime(DATETIME_FORMAT)
-        if self.PartsGr.get_target_parts():
-            part_nums = self.PartsGr.get_target_parts()
+        if self.Targets_set:
+            part_nums = self.Targets_set
         else:
             # Cases where multi-BOM(s) used don't have target parts.
             part_nums = self.PartsGr.get_report_parts()
-        self.graph = pydot.Dot(str(part_nums), graph_type="graph",
-                                            forcelabels=True,
-                                            bgcolor=self.back_color,
-                                            rankdir="TB",
-                                            label="%s %s" % (
-                                                   self.timestamp.split("T")[0],
-                                                                      username),
-                                            labeljust="r")
+        self.graph_id = self.graph_name or "+".join(sorted(map(str, part_nums)))
+        # Date label is the only part of graph that changes between runs w/
+        # same content (see get_layout_key()).
+        self.label = "%s %s" % (self.timestamp.split("T")[0], username)
+        # Graphviz layout engine (-K flag). Kept out of graph_attrs: a
+        # "layout" attribute would override neato -n2 when drawing a cached
+        # layout (see render_dot_lines()).
+        self.layout_engine = "dot"
+        self.graph_attrs = {"forcelabels": "true",
+                            "bgcolor": self.back_color,
+                            "rankdir": "TB",
+                            "label": self.label,
+                            "labeljust": "r"}
         # https://stackoverflow.com/questions/19280229/graphviz-putting-a-caption-on-a-node-in-addition-to-a-label
         # https://stackoverflow.com/questions/29003465/pydot-graphviz-how-to-order-horizontally-nodes-in-a-cluster-while-the-rest-of-t
 
-        # Create sub-graphs to enforce rank (node positioning top-to-bottom)
-        self.terminal_sub = pydot.Subgraph(rank="min")
-        self.target_sub = pydot.Subgraph(rank="max")
+        # DOT statements for nodes and edges, in the order they're added.
+        self.graph_stmts = []
+        self.node_count = 0
+        # Node IDs to put in sub-graphs that enforce rank (node positioning
+        # top-to-bottom).
+        self.terminal_ids = []      # rank=min
+        self.target_ids = []        # rank=max
         # https://stackoverflow.com/questions/25734244/how-do-i-place-nodes-on-the-same-level-in-dot
         # https://stackoverflow.com/questions/20910596/line-up-the-heads-of-dot-graph-using-pydot?noredirect=1&lq=1
 
         # Create set of parts to pull from and add to graph.
         if self.target_group_only:
-            Parts_set = self.PartsGr.get_target_parts().copy()
+            Parts_set = set(self.Targets_set)
         else:
             # Omit unreferenced platforms from the graph. Needed platforms will
             # be pulled in as parents when needed.
             Parts_set = self.PartsGr.get_parts(omit_platforms=True).copy()
+        if self.Parts_scope is not None:
+            Parts_set.intersection_update(self.Parts_scope)
         # Initialize set to hold parts already added to graph as nodes.
         self.graph_set = set()
 
-        # Initialize incrementer to use making unique "X" nodes representing
-        # no where-used results.
-        inc = 0
-        while len(Parts_set) > 0:
-            Part_i = Parts_set.pop()
-            if (Part_i.get_obs_status(silent=True) and
+        # Walk up breadth-first from starting parts (in P/N order), so depth
+        # limit and node budget cut off the levels farthest from them.
+        Start_list = sorted(Parts_set)
+        if (self.node_budget is not None
+                                and len(Start_list) > self.node_budget // 2):
+            # Keep room for each starting part's parents or summary node.
+            print("\nGraph limited to first %d of %d parts by node budget."
+                                % (self.node_budget // 2, len(Start_list)))
+            Start_list = Start_list[:self.node_budget // 2]
+        for Part_i in Start_list:
+            # Add starting parts' nodes first so node budget counts them.
+            if not (self.PartsGr.get_obs_status(Part_i) and self.exclude_obs
+                                        and Part_i not in self.Targets_set):
+                self.create_node(Part_i)
+        visit_queue = deque((Part_i, 0) for Part_i in Start_list)
+        # Parts added to queue so far (each is only expanded once).
+        Queued_set = set(Start_list)
+        # (part, collapsed parents) for each summary node. Nodes are added
+        # after the walk so their counts leave out parts drawn later.
+        Summary_list = []
+        while visit_queue:
+            Part_i, depth = visit_queue.popleft()
+            if (self.PartsGr.get_obs_status(Part_i) and
                               self.exclude_obs and
-                              Part_i not in self.PartsGr.get_target_parts()):
+                              Part_i not in self.Targets_set):
                 continue
             if Part_i not in self.graph_set:
                 self.create_node(Part_i)
             if Part_i.is_orphan():
-                # Platforms not considered orphans
-                x_node = pydot.Node("X%d" % inc, shape="box3d",
+                # Platforms not considered orphans. Each "X" node (representing
+                # no where-used results) is named for its part.
+                x_node_id = "X_%s" % Part_i
+                self.add_node(x_node_id, shape="box3d",
                                       style="filled", fontcolor="crimson",
                                       color="crimson", fillcolor=self.part_color,
                                       height=0.65,
                                       label="X")
-                self.graph.add_node(x_node)
-                self.graph.add_edge(pydot.Edge("X%d" % inc, Part_i.__str__(),
-                                                            color="crimson"))
-                self.terminal_sub.add_node(x_node)
-                inc += 1
+                self.add_edge(x_node_id, Part_i.__str__(), color="crimson")
+                self.terminal_ids.append(x_node_id)
 
-            for Parent_i in Part_i.get_parents():
+            Parents_list = [Parent_i for Parent_i in sorted(Part_i.get_parents())
+                        if self.Parts_scope is None or Parent_i in self.Parts_scope]
+            if self.exclude_obs:
+                Parents_list = [Parent_i for Parent_i in Parents_list
+                                if not self.PartsGr.get_obs_status(Parent_i)]
+            # Parents not on graph (or coming up) yet can be collapsed into a
+            # summary node.
+            New_list = [Parent_i for Parent_i in Parents_list
+                if Parent_i not in self.graph_set and Parent_i not in Queued_set]
+            keep_count = self.get_expand_count(len(New_list), depth,
+                                        len(visit_queue) + len(Summary_list))
+            Collapsed_list = New_list[keep_count:]
+            if Collapsed_list:
+                Summary_list.append((Part_i, Collapsed_list))
+
+            for Parent_i in Parents_list:
+                if Parent_i in Collapsed_list:
+                    continue
                 if Parent_i not in self.graph_set:
                     self.create_node(Parent_i)
-                    # Add to group so its parents are included (for case where
-                    # Parts_group starts out w/ only target parts)
-                    Parts_set.add(Parent_i)
-                if Parent_i.get_obs_status(silent=True):
-                    if self.exclude_obs:
-                        continue
+                if Parent_i not in Queued_set:
+                    # Add to queue so its parents are included (for case
+                    # where Parts_group starts out w/ only target parts)
+                    visit_queue.append((Parent_i, depth+1))
+                    Queued_set.add(Parent_i)
+                if self.PartsGr.get_obs_status(Parent_i):
                     line_color="crimson"
                 else:
                     line_color="black"
-                self.graph.add_edge(pydot.Edge(Parent_i.__str__(),
-                                           Part_i.__str__(), color=line_color))
+                self.add_edge(Parent_i.__str__(), Part_i.__str__(),
+                                                            color=line_color)
+
+        for Part_i, Collapsed_list in Summary_list:
+            self.add_summary_node(Part_i, Collapsed_list)
+
+        if (self.sfdp_threshold is not None
+                                    and self.node_count > self.sfdp_threshold):
+            # https://graphviz.org/docs/layouts/sfdp/
+            self.layout_engine = "sfdp"
+            self.graph_attrs["overlap"] = "prism"
+
+    def get_expand_count(self, new_count, depth, queued_count):
+        """Return how many of a part's [new_count] parents not yet on graph
+        can be added at given depth. The rest get collapsed.
+        queued_count nodes are still to come: parts waiting to be expanded
+        (room is kept for a summary node for each) and summary nodes not
+        added yet.
+        """
+        if self.max_depth is not None and depth >= self.max_depth:
+            return 0
+        expand_count = new_count
+        if self.max_fanout is not None and new_count > self.max_fanout:
+            # Leave room for the summary node.
+            expand_count = max(self.max_fanout - 1, 0)
+        if self.node_budget is not None:
+            # Each part added also needs room for its own summary node.
+            budget_left = self.node_budget - self.node_count - queued_count
+            if 2*expand_count + (expand_count < new_count) > budget_left:
+                expand_count = max((budget_left - 1) // 2, 0)
+        return expand_count
+
+    def add_summary_node(self, Part_i, Collapsed_list):
+        """Add node standing in for parents of Part_i in Collapsed_list and
+        everything above them.
+        """
+        Collapsed_set = set(Collapsed_list)
+        for Parent_i in Collapsed_list:
+            if not Parent_i.is_platform():
+                # Walk up tree. Ancestors stop at platforms, like graph.
+                Collapsed_set.update(self.PartsGr.get_ancestors(Parent_i))
+        if self.Parts_scope is not None:
+            Collapsed_set.intersection_update(self.Parts_scope)
+        # Don't count parts drawn anywhere on graph (called after walk).
+        Collapsed_set.difference_update(self.graph_set)
+        no_obs_count = sum(not self.PartsGr.get_obs_status(Part_j)
+                                                    for Part_j in Collapsed_set)
+        if no_obs_count:
+            outline_col = "black"
+        else:
+            outline_col = "crimson"
 
-        self.graph.add_subgraph(self.terminal_sub)
-        self.graph.add_subgraph(self.target_sub)
+        summary_id = "more_%s" % Part_i
+        self.add_node(summary_id, shape="folder", style="filled,dashed",
+                            fontcolor="black", color=outline_col,
+                            fillcolor=self.part_color, height=0.65,
+                            label="%d more above\n%d can't obsolete"
+                                        % (len(Collapsed_set), no_obs_count))
+        self.add_edge(summary_id, Part_i.__str__(), color=outline_col,
+                                                            style="dashed")
 
     def create_node(self, Part_obj):
-        if Part_obj.get_obs_status(silent=True):
+        if self.PartsGr.get_obs_status(Part_obj):
             if self.exclude_obs:
                 return
             outline_col = "crimson"
         else:
             outline_col = "black"
 
-        if isinstance(Part_obj, Platform):
+        if Part_obj.is_platform():
             # font_color = "green4"
             # font_color = "#2d7bed"
             font_color = "#4242ff"
@@ -1204,34 +3190,447 @@ class TreeGraph(object):
         else:
             label_text = "%s\n%s" % (Part_obj.get_pn(), Part_obj.get_name())
 
-        Part_obj_node = pydot.Node(Part_obj.__str__(), shape="box3d",
+        self.add_node(Part_obj.__str__(), shape="box3d",
                                   style="filled", fontcolor=font_color,
                                   color=outline_col, fillcolor=self.part_color,
                                   height=0.65,
                                   label=label_text)
-        self.graph.add_node(Part_obj_node)
         self.graph_set.add(Part_obj)
 
-        if isinstance(Part_obj, Platform):
-            self.terminal_sub.add_node(Part_obj_node)
-        elif Part_obj in self.PartsGr.get_target_parts():
-            self.target_sub.add_node(Part_obj_node)
+        if Part_obj.is_platform():
+            self.terminal_ids.append(Part_obj.__str__())
+        elif Part_obj in self.Targets_set:
+            self.target_ids.append(Part_obj.__str__())
+
+    def add_node(self, node_id, **attrs):
+        self.node_count += 1
+        self.graph_stmts.append("%s %s;\n" % (dot_quote(node_id),
+                                                        dot_attr_list(attrs)))
+
+    def add_edge(self, src_id, dst_id, **attrs):
+        self.graph_stmts.append("%s -- %s %s;\n" % (dot_quote(src_id),
+                                    dot_quote(dst_id), dot_attr_list(attrs)))
+
+    def iter_dot_lines(self, layout_hash=None):
+        """Generator that yields graph's DOT source a statement at a time.
+        Statements are sorted so same graph content always gives same source
+        (parts are added in set order).
+        If layout_hash (hashlib object) is given, every line but the date
+        label is added to it as it's generated (see get_layout_key()).
+        """
+        yield hash_dot_line("graph %s {\n" % dot_quote(self.graph_id),
+                                                                layout_hash)
+        for attr_name, value in self.graph_attrs.items():
+            if attr_name == "label":
+                yield "%s=%s;\n" % (attr_name, dot_quote(value))
+                continue
+            yield hash_dot_line("%s=%s;\n" % (attr_name, dot_quote(value)),
+                                                                layout_hash)
+        for stmt in sorted(self.graph_stmts):
+            yield hash_dot_line(stmt, layout_hash)
+        for rank, node_ids in [("min", self.terminal_ids),
+                                                    ("max", self.target_ids)]:
+            yield hash_dot_line("subgraph {\nrank=%s;\n" % rank, layout_hash)
+            for node_id in sorted(node_ids):
+                yield hash_dot_line("%s;\n" % dot_quote(node_id), layout_hash)
+            yield hash_dot_line("}\n", layout_hash)
+        yield hash_dot_line("}\n", layout_hash)
+
+    def get_layout_hash(self):
+        """Return new hashlib object for layout key, seeded w/ layout engine
+        (it isn't in DOT source).
+        """
+        return hashlib.sha1(("layout=%s;\n" % self.layout_engine).encode("utf-8"))
+
+    def get_layout_key(self):
+        """Hash of graph's layout engine, nodes, edges and styling, leaving
+        out date label. Graphs w/ same key have same layout.
+        """
+        layout_hash = self.get_layout_hash()
+        for line in self.iter_dot_lines(layout_hash):
+            pass
+        return layout_hash.hexdigest()
 
-    def export_graph(self, suffix=None):
+    def get_render_source(self, use_cache=True):
+        """Return DOT source and layout key for render_dot_lines(). W/ cache,
+        source is generated once, hashed along the way, and kept as a list
+        (it's needed again if layout isn't cached). W/o cache, it's a
+        generator streamed straight to Graphviz, and key is None.
+        """
+        if not use_cache:
+            return self.iter_dot_lines(), None
+        layout_hash = self.get_layout_hash()
+        dot_lines = list(self.iter_dot_lines(layout_hash))
+        return dot_lines, layout_hash.hexdigest()
+
+    def get_export_path(self, suffix=None, graph_format="png"):
+        assert graph_format in GRAPH_FORMATS, ("Graph format must be one of %s"
+                                                    % ", ".join(GRAPH_FORMATS))
+        if self.graph_name:
+            graph_str = self.graph_name
+        else:
+            graph_str = self.PartsGr.get_pn_string(max_len=36)
         export_path_no_ext = os.path.join(EXPORT_DIR, "%s_%s_tree"
-                     % (self.timestamp, self.PartsGr.get_pn_string(max_len=36)))
+                                                % (self.timestamp, graph_str))
 
         if suffix is not None:
             suffix = "_%s" % suffix
         else:
             suffix = ""
-        export_img_path = "%s%s.%s" % (export_path_no_ext, suffix, "png")
+        return "%s%s.%s" % (export_path_no_ext, suffix, graph_format)
+
+    def get_graph_data(self):
+        """Return dict of graph's parts for the JSON/HTML viewer formats: each
+        part's description, obs status, platform flags and platforms it's used
+        on ("nodes"), and each part's parents ("parents"), keyed by P/N.
+        Includes everything above starting parts (level-of-detail limits
+        don't apply; viewer only draws parts as they're expanded). "start"
+        lists starting parts that aren't parents of other parts on graph.
+        """
+        if self.target_group_only:
+            Parts_set = set(self.Targets_set)
+        else:
+            Parts_set = self.PartsGr.get_parts(omit_platforms=True).copy()
+        if self.Parts_scope is not None:
+            Parts_set.intersection_update(self.Parts_scope)
+
+        nodes = {}
+        parents = {}
+        visit_stack = sorted(Parts_set, reverse=True)
+        while visit_stack:
+            Part_i = visit_stack.pop()
+            if Part_i.get_pn() in nodes:
+                continue
+            if (self.PartsGr.get_obs_status(Part_i) and self.exclude_obs
+                                        and Part_i not in self.Targets_set):
+                continue
+            Platforms_list, all_can_obs = self.PartsGr.get_platform_app(Part_i)
+            nodes[Part_i.get_pn()] = {"name": Part_i.get_name(),
+                        "can_obs": bool(self.PartsGr.get_obs_status(Part_i)),
+                        "platform": Part_i.is_platform(),
+                        "target": Part_i in self.Targets_set,
+                        "orphan": bool(Part_i.is_orphan()),
+                        "platforms": [Platform_i.get_pn()
+                                            for Platform_i in Platforms_list]}
+            Parents_list = [Parent_i for Parent_i in sorted(Part_i.get_parents())
+                        if self.Parts_scope is None or Parent_i in self.Parts_scope]
+            if self.exclude_obs:
+                Parents_list = [Parent_i for Parent_i in Parents_list
+                                if not self.PartsGr.get_obs_status(Parent_i)]
+            parents[Part_i.get_pn()] = [Parent_i.get_pn()
+                                                for Parent_i in Parents_list]
+            visit_stack.extend(reversed(Parents_list))
+
+        parent_nums = set()
+        for parent_list in parents.values():
+            parent_nums.update(parent_list)
+        start_nums = [Part_i.get_pn() for Part_i in sorted(Parts_set)
+                                                if Part_i.get_pn() in nodes]
+        # Every start part could be above another (circular BOM).
+        start_nums = ([part_num for part_num in start_nums
+                            if part_num not in parent_nums] or start_nums)
+        return {"graph": self.graph_id, "label": self.label,
+                    "start": start_nums, "nodes": nodes, "parents": parents}
+
+    def write_graph_data(self, export_path, graph_format):
+        """Write graph data to JSON file, or HTML viewer page w/ data
+        embedded.
+        """
+        graph_data = self.get_graph_data()
+        if graph_format == "json":
+            graph_viewer.write_graph_json(graph_data, export_path)
+        else:
+            graph_viewer.write_graph_html(graph_data, export_path,
+                                back_color=self.back_color,
+                                                part_color=self.part_color)
+
+    def export_graph(self, suffix=None, graph_format="png", use_cache=True):
+        """Render graph to export folder. If use_cache is True, layout is
+        reused from a previous run w/ same graph content if there is one (see
+        render_dot_lines()).
+        """
+        export_img_path = self.get_export_path(suffix, graph_format)
         print("\nWriting graph to %s..." % os.path.basename(export_img_path), end="")
-        self.graph.write_png(export_img_path)
+        if graph_format in VIEWER_FORMATS:
+            self.write_graph_data(export_img_path, graph_format)
+            print("done")
+            return
+        dot_lines, layout_key = self.get_render_source(use_cache
+                                                    and graph_format != "dot")
+        status, render_time, error_text = render_dot_lines(dot_lines,
+                                    export_img_path, graph_format,
+                                    layout_key=layout_key, label=self.label,
+                                    layout_engine=self.layout_engine)
+        assert status == "ok", ("Graphviz failed to render %s:\n%s"
+                    % (os.path.basename(export_img_path), error_text or status))
         print("done")
+        if use_cache:
+            prune_report_cache(RENDER_CACHE_MAX_FILES, RENDER_CACHE_MAX_BYTES,
+                                                    cache_dir=RENDER_CACHE_DIR)
+
+
+def split_tree_graphs(PartsGr, split_by="target", target_group_only=True,
+                                                            **graph_kwargs):
+    """Split group into independent TreeGraphs: one per target part
+    (split_by="target") showing everything above it, or one per platform
+    (split_by="platform") showing only parts used on that platform.
+    Remaining keyword args are passed to each TreeGraph.
+    Returns list of TreeGraphs, sorted by name.
+    """
+    assert split_by in ["target", "platform"], ("Graphs can only be split "
+                                                    "by 'target' or 'platform'.")
+    TreeGraphs_list = []
+    if split_by == "target":
+        for TargetPart in sorted(PartsGr.get_target_parts()):
+            TreeGraphs_list.append(TreeGraph(PartsGr,
+                    target_group_only=target_group_only,
+                    Targets_set=set({TargetPart}), graph_name=str(TargetPart),
+                                                            **graph_kwargs))
+    else:
+        for Platform_i in sorted(PartsGr.get_platforms()):
+            Parts_scope = PartsGr.get_descendants(set({Platform_i}))
+            Parts_scope.add(Platform_i)
+            Targets_set = PartsGr.get_target_parts() & Parts_scope
+            if (target_group_only and not Targets_set) or len(Parts_scope) == 1:
+                # Nothing to graph under this platform.
+                continue
+            TreeGraphs_list.append(TreeGraph(PartsGr,
+                    target_group_only=target_group_only, Targets_set=Targets_set,
+                    Parts_scope=Parts_scope, graph_name=str(Platform_i),
+                                                            **graph_kwargs))
+    return TreeGraphs_list
+
+
+def export_tree_graphs(TreeGraphs_list, graph_format="png", workers=1,
+                                                timeout=None, use_cache=True):
+    """Render several TreeGraphs at once, running up to [workers] Graphviz
+    processes concurrently. A graph whose layout takes longer than timeout
+    (seconds) is skipped. Writes an index CSV listing each graph's output file
+    and how its render went. Returns path of index file.
+    use_cache is same as for TreeGraph.export_graph().
+    """
+    render_jobs = []
+    for TreeViz in TreeGraphs_list:
+        if graph_format in VIEWER_FORMATS:
+            render_jobs.append((None,
+                            TreeViz.get_export_path(graph_format=graph_format)))
+            continue
+        dot_lines, layout_key = TreeViz.get_render_source(use_cache
+                                                    and graph_format != "dot")
+        render_jobs.append((dot_lines,
+                            TreeViz.get_export_path(graph_format=graph_format),
+                            graph_format, timeout, layout_key, TreeViz.label,
+                                                    TreeViz.layout_engine))
+
+    if graph_format in VIEWER_FORMATS:
+        # No Graphviz involved; quick enough to write one at a time.
+        print("\nWriting %d graphs..." % len(render_jobs), end="")
+        results = []
+        for TreeViz, render_job in zip(TreeGraphs_list, render_jobs):
+            start_time = time.time()
+            TreeViz.write_graph_data(render_job[1], graph_format)
+            results.append(("ok", time.time() - start_time, ""))
+    else:
+        print("\nRendering %d graphs (%d at a time)..." % (len(render_jobs),
+                                                            workers), end="")
+        # Each job's time is spent waiting on its own dot process, so threads
+        # are enough to keep [workers] processes busy.
+        # https://docs.python.org/3/library/concurrent.futures.html
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(render_dot_lines, *zip(*render_jobs)))
+    print("done")
+    if use_cache and graph_format not in VIEWER_FORMATS:
+        prune_report_cache(RENDER_CACHE_MAX_FILES, RENDER_CACHE_MAX_BYTES,
+                                                    cache_dir=RENDER_CACHE_DIR)
+
+    timestamp = datetime.now().strftime(DATETIME_FORMAT)
+    index_path = os.path.join(EXPORT_DIR, "%s_%d_tree_index.csv"
+                                            % (timestamp, len(render_jobs)))
+    print("\nWriting graph index to %s..." % os.path.basename(index_path), end="")
+    with open(index_path, 'w+') as output_file:
+        output_file_csv = csv.writer(output_file, dialect="excel")
+        output_file_csv.writerow(["Graph", "Nodes", "File", "Status", "Seconds",
+                                                                    "Error"])
+        for TreeViz, render_job, (status, render_time, error_text) in zip(
+                                    TreeGraphs_list, render_jobs, results):
+            output_path = render_job[1]
+            output_file_csv.writerow([TreeViz.graph_name, TreeViz.node_count,
+                    os.path.basename(output_path), status, "%.1f" % render_time,
+                                                                    error_text])
+    print("done")
+
+    failed_count = sum(result[0] != "ok" for result in results)
+    if failed_count:
+        print(Fore.YELLOW + "%d of %d graphs not rendered (see index)."
+                            % (failed_count, len(results)) + Style.RESET_ALL)
+    return index_path
+
+
+def dot_quote(value):
+    """Return value as a quoted DOT string (line breaks become centered "\\n"
+    breaks).
+    """
+    return '"%s"' % (str(value).replace("\\", "\\\\").replace('"', '\\"')
+                                                    .replace("\n", "\\n"))
+
+
+def dot_attr_list(attrs):
+    """Return DOT attribute list (e.g. '[shape="box3d", height="0.65"]') for
+    dict of attributes.
+    """
+    return "[%s]" % ", ".join("%s=%s" % (attr_name, dot_quote(value))
+                                            for attr_name, value in attrs.items())
+
+
+def hash_dot_line(line, layout_hash):
+    if layout_hash is not None:
+        layout_hash.update(line.encode("utf-8"))
+    return line
+
+
+def write_dot_lines(dot_file, dot_lines):
+    """Write DOT source (iterable of strings) to Graphviz's stdin and close
+    it.
+    """
+    try:
+        with dot_file:
+            for line in dot_lines:
+                dot_file.write(line.encode("utf-8"))
+    except BrokenPipeError:
+        # Graphviz quit early (syntax error, or killed after timeout). Exit
+        # code and error output say why.
+        pass
+
+
+def run_graphviz(command, dot_lines, timeout=None):
+    """Run Graphviz command, streaming DOT source (iterable of strings) to its
+    stdin. Returns its stdout. Raises subprocess.CalledProcessError (w/
+    Graphviz's error output as stderr) if it fails, or
+    subprocess.TimeoutExpired (after killing it) if it runs past timeout.
+    """
+    # https://graphviz.org/doc/info/command.html
+    # Output goes to temp files instead of pipes, so Graphviz can't fill a
+    # pipe and stall while source is still being written.
+    with tempfile.TemporaryFile() as output_file, \
+                                    tempfile.TemporaryFile() as error_file:
+        graphviz_proc = subprocess.Popen(command, stdin=subprocess.PIPE,
+                                        stdout=output_file, stderr=error_file)
+        # Source is written from another thread so timeout also covers time
+        # spent blocked writing it.
+        writer = threading.Thread(target=write_dot_lines,
+                                        args=(graphviz_proc.stdin, dot_lines))
+        writer.start()
+        try:
+            graphviz_proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            graphviz_proc.kill()
+            graphviz_proc.wait()
+            raise
+        finally:
+            writer.join()
+        output_file.seek(0)
+        output_data = output_file.read()
+        error_file.seek(0)
+        error_data = error_file.read()
+    if graphviz_proc.returncode:
+        raise subprocess.CalledProcessError(graphviz_proc.returncode, command,
+                                            output=output_data, stderr=error_data)
+    return output_data
+
+
+def render_dot_lines(dot_lines, output_path, graph_format, timeout=None,
+                        layout_key=None, label=None, layout_engine="dot"):
+    """Render DOT source (iterable of strings) w/ Graphviz (or just write it
+    out for "dot" format). Source is streamed to Graphviz as it's generated.
+    If layout_key is given (see TreeGraph.get_layout_key()), layout is done
+    once by Graphviz and cached under that key. Later renders w/ same key
+    re-stamp the cached layout w/ the new graph label and draw it w/o
+    laying it out again. layout_engine (e.g. "sfdp") is only used for the
+    layout step.
+    Returns status ("ok", "timeout" or "failed"), seconds taken, and
+    Graphviz's error output if it failed. Partial output from a failed render
+    is removed.
+    """
+    start_time = time.time()
+    if graph_format == "dot":
+        with open(output_path, "w") as export_file:
+            export_file.writelines(dot_lines)
+        return "ok", time.time() - start_time, ""
+    error_text = ""
+    try:
+        if layout_key is None:
+            # https://graphviz.org/doc/info/command.html#-K
+            run_graphviz([GRAPHVIZ_DOT, "-T%s" % graph_format,
+                                "-K%s" % layout_engine, "-o", output_path],
+                                                    dot_lines, timeout=timeout)
+        else:
+            layout_text = load_cached_layout(layout_key, label)
+            if layout_text is None:
+                # Graphviz's "dot" output is the graph w/ every node and edge
+                # position filled in.
+                # https://graphviz.org/docs/outputs/canon/
+                layout_text = run_graphviz([GRAPHVIZ_DOT, "-Tdot",
+                                        "-K%s" % layout_engine], dot_lines,
+                                            timeout=timeout).decode("utf-8")
+                save_cached_layout(layout_key, layout_text, label)
+            # neato -n2 uses positions as given instead of doing a layout.
+            # https://graphviz.org/faq/#FaqDotWithNodeCoords
+            run_graphviz([GRAPHVIZ_NEATO, "-n2", "-T%s" % graph_format, "-o",
+                                output_path], [layout_text], timeout=timeout)
+        status = "ok"
+    except subprocess.TimeoutExpired:
+        status = "timeout"
+    except subprocess.CalledProcessError as err:
+        status = "failed"
+        error_text = err.stderr.decode("utf-8", "replace").strip()
+    except OSError as err:
+        # e.g. Graphviz not installed.
+        status = "failed"
+        error_text = str(err)
+    if status != "ok" and os.path.exists(output_path):
+        os.remove(output_path)
+    return status, time.time() - start_time, error_text
+
+
+def get_layout_cache_path(layout_key):
+    return os.path.join(RENDER_CACHE_DIR, layout_key + ".pkl")
+
+
+def load_cached_layout(layout_key, label):
+    """Returns cached layout (DOT source w/ positions) for given key, w/ graph
+    label replaced by given label. Returns None if there's no (readable)
+    entry, or its label can't be found to replace.
+    """
+    cache_path = get_layout_cache_path(layout_key)
+    try:
+        with open(cache_path, "rb") as cache_file:
+            cache_entry = pickle.load(cache_file)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Truncated or otherwise unreadable entry. Treat as a miss (will be
+        # overwritten).
+        return None
+    if cache_entry.get("key") != layout_key:
+        return None
+    layout_text = cache_entry["layout"]
+    if cache_entry["label"] != label:
+        old_label = dot_quote(cache_entry["label"])
+        if layout_text.count(old_label) != 1:
+            return None
+        layout_text = layout_text.replace(old_label, dot_quote(label))
+
+    # Refresh mod. time so pruning evicts least-recently-used entries first.
+    try:
+        os.utime(cache_path)
+    except OSError:
+        pass
+    return layout_text
+
 
-        # GraphViz format:
-        # export_gv_path = "%s.%s" % (export_path_no_ext, "gv")
-        # print("\nWriting graph to %s..." % os.path.basename(export_gv_path))
-        # self.graph.write(export_gv_path)
-        # print("...done")
+def save_cached_layout(layout_key, layout_text, label):
+    try:
+        write_pickle(get_layout_cache_path(layout_key), {"key": layout_key,
+                                        "label": label, "layout": layout_text})
+    except OSError as err:
+        print("Couldn't write render cache entry (%s)" % err)
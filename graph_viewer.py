@@ -0,0 +1,218 @@
+"""Writes where-used graph data (from TreeGraph.get_graph_data()) as JSON, or
+as a self-contained HTML page that draws the graph in the browser.
+The page needs no network access or Graphviz. It starts w/ just the starting
+parts (target parts, or bottom-level parts) and shows a part's parents when
+it's clicked, so only the parts being looked at are ever drawn.
+"""
+import json
+
+# Graphviz (X11) color names used on graphs that CSS doesn't have. CSS
+# ignores an unknown color, so page would fall back to white.
+# https://graphviz.org/doc/info/colors.html
+CSS_COLORS = {"slategray4": "#6c7b8b"}
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>%(title)s</title>
+<style>
+body { margin: 0; font-family: sans-serif; font-size: 12px; background: %(back_color)s; }
+#toolbar { position: fixed; top: 0; left: 0; right: 0; padding: 6px 10px;
+    background: #eee; border-bottom: 1px solid #999; z-index: 1; }
+#toolbar input { width: 140px; }
+#info { position: fixed; right: 10px; top: 44px; width: 260px; padding: 8px;
+    background: #fff; border: 1px solid #999; display: none; z-index: 1; }
+#canvas { margin-top: 40px; }
+.node rect { stroke-width: 2px; }
+.node text { pointer-events: none; }
+.node { cursor: pointer; }
+.edge { stroke-width: 1.5px; fill: none; }
+</style>
+</head>
+<body>
+<div id="toolbar">
+<b>%(title)s</b> &nbsp; %(label)s &nbsp;
+<button onclick="expandAll()">Expand all</button>
+<button onclick="reset()">Reset</button>
+&nbsp; Find P/N: <input id="find" onkeydown="if (event.key == 'Enter') findPart(this.value)">
+&nbsp; <span id="status"></span>
+</div>
+<div id="info"></div>
+<svg id="canvas" xmlns="http://www.w3.org/2000/svg"></svg>
+<script type="application/json" id="graph-data">%(graph_json)s</script>
+<script>
+// Click a part to show (or hide) its parents. Shift+click shows everything
+// above it. Outline is crimson if part can be obsoleted.
+var data = JSON.parse(document.getElementById("graph-data").textContent);
+var NODE_W = 130, NODE_H = 38, GAP_X = 14, GAP_Y = 50;
+var expanded = {};
+var highlight = null;
+
+function getParents(pn) { return data.parents[pn] || []; }
+
+function reset() { expanded = {}; highlight = null; draw(); }
+
+function expandAbove(pn) {
+    var stack = [pn];
+    while (stack.length) {
+        var pn_i = stack.pop();
+        if (expanded[pn_i]) continue;
+        expanded[pn_i] = true;
+        stack.push.apply(stack, getParents(pn_i));
+    }
+}
+
+function expandAll() { data.start.forEach(expandAbove); draw(); }
+
+function findPart(pn) {
+    pn = pn.trim().toUpperCase();
+    if (!data.nodes[pn]) { setStatus(pn + " not in graph"); return; }
+    // Expand every part below it so it comes into view.
+    var children = {};
+    for (var child in data.parents) {
+        getParents(child).forEach(function (parent) {
+            (children[parent] = children[parent] || []).push(child);
+        });
+    }
+    var stack = [pn], seen = {};
+    while (stack.length) {
+        var pn_i = stack.pop();
+        if (seen[pn_i]) continue;
+        seen[pn_i] = true;
+        (children[pn_i] || []).forEach(function (child) {
+            expanded[child] = true;
+            stack.push(child);
+        });
+    }
+    highlight = pn;
+    draw();
+    showInfo(pn);
+}
+
+function setStatus(text) { document.getElementById("status").textContent = text; }
+
+function showInfo(pn) {
+    var node = data.nodes[pn], info = document.getElementById("info");
+    var lines = ["<b>" + escapeHtml(pn) + "</b>", escapeHtml(node.name),
+        "Can obsolete: " + (node.can_obs ? "yes" : "no")];
+    if (node.platform) lines.push("Platform");
+    if (node.orphan) lines.push("No where-used results (orphan)");
+    if (node.platforms.length) lines.push("Used on: " + node.platforms.join(", "));
+    lines.push(getParents(pn).length + " parent(s)");
+    info.innerHTML = lines.join("<br>");
+    info.style.display = "block";
+}
+
+function escapeHtml(text) {
+    return String(text).replace(/&/g, "&amp;").replace(/</g, "&lt;").replace(/>/g, "&gt;");
+}
+
+// Parts shown are the starting parts plus parents of every expanded part
+// shown. Each part's row is one above its highest child.
+function layout() {
+    var level = {}, order = [];
+    data.start.forEach(function (pn) { level[pn] = 0; order.push(pn); });
+    for (var i = 0; i < order.length; i++) {
+        var pn = order[i];
+        if (!expanded[pn]) continue;
+        getParents(pn).forEach(function (parent) {
+            if (!(parent in level)) order.push(parent);
+            if (!(parent in level) || level[parent] < level[pn] + 1) {
+                // Capped so circular BOMs can't push parts up forever.
+                level[parent] = Math.min(level[pn] + 1, order.length);
+            }
+        });
+    }
+    var rows = [];
+    order.forEach(function (pn) { (rows[level[pn]] = rows[level[pn]] || []).push(pn); });
+    return {level: level, order: order, rows: rows};
+}
+
+function draw() {
+    var lay = layout(), svg = document.getElementById("canvas"), pos = {};
+    var width = 0, height = (lay.rows.length) * (NODE_H + GAP_Y) + GAP_Y;
+    lay.rows.forEach(function (row, row_num) {
+        (row || []).forEach(function (pn, col_num) {
+            pos[pn] = {x: GAP_X + col_num * (NODE_W + GAP_X),
+                       y: height - (row_num + 1) * (NODE_H + GAP_Y)};
+            width = Math.max(width, pos[pn].x + NODE_W + GAP_X);
+        });
+    });
+    svg.setAttribute("width", width);
+    svg.setAttribute("height", height);
+    var parts = [];
+    lay.order.forEach(function (pn) {
+        if (!expanded[pn]) return;
+        getParents(pn).forEach(function (parent) {
+            var color = data.nodes[parent].can_obs ? "crimson" : "black";
+            parts.push('<path class="edge" stroke="' + color + '" d="M' +
+                (pos[pn].x + NODE_W / 2) + "," + pos[pn].y + " L" +
+                (pos[parent].x + NODE_W / 2) + "," + (pos[parent].y + NODE_H) + '"/>');
+        });
+    });
+    lay.order.forEach(function (pn) {
+        var node = data.nodes[pn], p = pos[pn];
+        var hidden = expanded[pn] ? 0 : getParents(pn).length;
+        var outline = node.can_obs ? "crimson" : "black";
+        parts.push('<g class="node" data-pn="' + escapeHtml(pn) + '">' +
+            '<rect x="' + p.x + '" y="' + p.y + '" width="' + NODE_W + '" height="' + NODE_H +
+            '" fill="' + (pn == highlight ? "#ffd966" : "%(part_color)s") + '" stroke="' + outline + '"/>' +
+            '<text x="' + (p.x + 6) + '" y="' + (p.y + 15) + '" fill="' +
+            (node.platform ? "#4242ff" : "black") + '"><tspan font-weight="bold">' + escapeHtml(pn) +
+            '</tspan>' + (hidden ? ' <tspan fill="#555">+' + hidden + '</tspan>' : "") +
+            (node.orphan ? ' <tspan fill="crimson">X</tspan>' : "") + '</text>' +
+            '<text x="' + (p.x + 6) + '" y="' + (p.y + 30) + '">' +
+            escapeHtml(node.name.slice(0, 20)) + '</text></g>');
+    });
+    svg.innerHTML = parts.join("");
+    setStatus(lay.order.length + " of " + Object.keys(data.nodes).length + " parts shown");
+}
+
+document.getElementById("canvas").addEventListener("click", function (event) {
+    var group = event.target.closest(".node");
+    if (!group) return;
+    var pn = group.getAttribute("data-pn");
+    if (event.shiftKey) expandAbove(pn);
+    else if (expanded[pn]) delete expanded[pn];
+    else expanded[pn] = true;
+    showInfo(pn);
+    draw();
+});
+
+draw();
+</script>
+</body>
+</html>
+"""
+
+
+def write_graph_json(graph_data, export_path):
+    with open(export_path, "w") as export_file:
+        json.dump(graph_data, export_file)
+
+
+def write_graph_html(graph_data, export_path, back_color="slategray4",
+                                                            part_color="grey"):
+    """Write self-contained HTML viewer w/ graph data embedded.
+    """
+    # "</" can't appear inside a <script> element.
+    graph_json = json.dumps(graph_data).replace("</", "<\\/")
+    with open(export_path, "w") as export_file:
+        export_file.write(HTML_TEMPLATE % {
+                        "title": escape_html(graph_data["graph"]),
+                        "label": escape_html(graph_data["label"]),
+                        "back_color": get_css_color(back_color),
+                        "part_color": get_css_color(part_color),
+                        "graph_json": graph_json})
+
+
+def get_css_color(color_name):
+    """Return CSS equivalent of Graphviz color name.
+    """
+    return CSS_COLORS.get(color_name.lower(), color_name)
+
+
+def escape_html(text):
+    return (str(text).replace("&", "&amp;").replace("<", "&lt;")
+                                                    .replace(">", "&gt;"))
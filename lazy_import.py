@@ -0,0 +1,48 @@
+"""Stand-ins for heavy modules (pandas, NumPy, openpyxl) that only
+import the real module the first time it's used, so modes that never touch a
+module don't pay to load it. Load times are recorded for the import-timing
+report (where-used.py -it flag).
+"""
+import time
+import importlib
+
+# Module name -> seconds spent importing it, in order loaded.
+import_times = {}
+
+
+class LazyModule(object):
+    """Module proxy. Any attribute access imports the real module (once) and
+    is passed through to it.
+    """
+    def __init__(self, module_name):
+        # Set through __dict__ so __getattr__ isn't triggered.
+        self.__dict__["module_name"] = module_name
+        self.__dict__["module"] = None
+
+    def load(self):
+        if self.module is None:
+            start_time = time.perf_counter()
+            module = importlib.import_module(self.module_name)
+            import_times[self.module_name] = time.perf_counter() - start_time
+            self.__dict__["module"] = module
+        return self.module
+
+    def __getattr__(self, attr_name):
+        return getattr(self.load(), attr_name)
+
+    def __repr__(self):
+        return "LazyModule object: %s (%s)" % (self.module_name,
+                                "loaded" if self.module else "not loaded")
+
+
+def print_import_times(startup_time=None):
+    """Print time spent loading modules. startup_time is time from script
+    start until it was ready to run (including its own non-lazy imports).
+    """
+    print("\nImport times:")
+    if startup_time is not None:
+        print("\t%-16s %6.2f s" % ("startup", startup_time))
+    if not import_times:
+        print("\tNo lazy modules loaded.")
+    for module_name, load_time in import_times.items():
+        print("\t%-16s %6.2f s" % (module_name, load_time))
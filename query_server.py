@@ -0,0 +1,161 @@
+"""Query server that keeps an imported PartGroup in memory and answers
+questions about it over HTTP w/ JSON (where-used.py "serve" mode).
+
+POST /query w/ a JSON body like
+    {"query": "platforms", "parts": ["123456", "234567"]}
+Query types:
+    union       union BOM of all given parts (parts plus everything below them)
+    platforms   platforms each part is used on
+    where_used  every part above each part
+    assy_list   parts above each part that aren't platforms or mods
+    can_obs     can-obsolete status of each part
+Response is {"query": ..., "results": ..., "missing": [P/Ns not in group]}.
+GET /status returns part count and report info for loaded group.
+"""
+import json
+import threading
+from contextlib import nullcontext
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+# https://docs.python.org/3/library/http.server.html
+
+from class_def import CompactPartGroup
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+QUERY_TYPES = ["union", "platforms", "where_used", "assy_list", "can_obs"]
+
+
+class PartGroupQueries(object):
+    """Answers queries against an imported PartGroup (or CompactPartGroup).
+    Safe to use from multiple threads at once.
+    """
+    def __init__(self, PartsGr):
+        self.PartsGr = PartsGr
+        # PartGroup memoizes ancestor closures as they're computed, so
+        # where_used and assy_list queries on it take turns. CompactPartGroup
+        # walks its arrays w/o storing anything. Other queries only read.
+        if isinstance(PartsGr, CompactPartGroup):
+            self.ancestor_lock = nullcontext()
+        else:
+            self.ancestor_lock = threading.Lock()
+        # Fill in can-obs status and platforms of every part (and compact
+        # arrays) up front so no query has to.
+        print("\nEvaluating can-obs status of %d parts..."
+                                    % self.PartsGr.get_part_count(), end="")
+        self.PartsGr.evaluate_obs_status()
+        self.PartsGr.evaluate_platform_bits()
+        print("done")
+
+    def get_status(self):
+        return {"part_count": self.PartsGr.get_part_count(),
+                "report_type": self.PartsGr.report_type,
+                "report_count": len(self.PartsGr.get_report_parts()),
+                "eff_date_str": self.PartsGr.eff_date_str}
+
+    def run_query(self, query):
+        """Run one query (dict decoded from request JSON) and return result
+        as dict ready to be encoded. Raises ValueError for a malformed query.
+        """
+        if not isinstance(query, dict):
+            raise ValueError("Query must be a JSON object.")
+        query_type = query.get("query")
+        if query_type not in QUERY_TYPES:
+            raise ValueError("Unrecognized query type: %r (expected one of %s)"
+                                        % (query_type, ", ".join(QUERY_TYPES)))
+        part_nums = query.get("parts")
+        if (not isinstance(part_nums, list)
+                        or not all(isinstance(pn, str) for pn in part_nums)):
+            raise ValueError("'parts' must be a list of P/N strings.")
+
+        Parts_list = []
+        missing_pns = []
+        for part_num in part_nums:
+            Part_i = self.PartsGr.get_part(part_num.strip().upper())
+            if Part_i:
+                Parts_list.append(Part_i)
+            else:
+                missing_pns.append(part_num)
+
+        if query_type == "union":
+            union_bom = set(Parts_list)
+            union_bom.update(self.PartsGr.get_descendants(union_bom))
+            omit_platforms = bool(query.get("omit_platforms", True))
+            results = get_pn_list(union_bom, omit_platforms=omit_platforms)
+        elif query_type == "can_obs":
+            results = {Part_i.get_pn(): bool(self.PartsGr.get_obs_status(Part_i))
+                                                        for Part_i in Parts_list}
+        elif query_type == "platforms":
+            # Read from platform bitsets filled in by __init__().
+            results = {Part_i.get_pn():
+                        get_pn_list(self.PartsGr.get_platform_app(Part_i)[0])
+                                                        for Part_i in Parts_list}
+        else:
+            results = {}
+            with self.ancestor_lock:
+                for Part_i in Parts_list:
+                    Parts_set = self.PartsGr.get_parents_above(Part_i,
+                                        assy_only=(query_type == "assy_list"))
+                    results[Part_i.get_pn()] = get_pn_list(Parts_set)
+
+        return {"query": query_type, "results": results, "missing": missing_pns}
+
+
+def get_pn_list(Parts_set, omit_platforms=False):
+    """Return sorted list of P/Ns of given parts.
+    """
+    return sorted(Part_i.get_pn() for Part_i in Parts_set
+                                if not (omit_platforms and Part_i.is_platform()))
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """Handles one HTTP request. Server's "queries" attribute holds the
+    PartGroupQueries object to answer from.
+    """
+    def do_GET(self):
+        if self.path == "/status":
+            self.send_json(200, self.server.queries.get_status())
+        else:
+            self.send_json(404, {"error": "Unknown path: %s" % self.path})
+
+    def do_POST(self):
+        if self.path != "/query":
+            self.send_json(404, {"error": "Unknown path: %s" % self.path})
+            return
+        try:
+            body_len = int(self.headers.get("Content-Length", 0))
+            query = json.loads(self.rfile.read(body_len).decode("utf-8"))
+            response = self.server.queries.run_query(query)
+        except ValueError as err:
+            # Includes JSON decoding errors.
+            self.send_json(400, {"error": str(err)})
+            return
+        self.send_json(200, response)
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+def serve(PartsGr, host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False):
+    """Answer queries against PartsGr until interrupted (Ctrl+C). Each request
+    is handled in its own thread.
+    """
+    server = ThreadingHTTPServer((host, port), QueryRequestHandler)
+    server.queries = PartGroupQueries(PartsGr)
+    server.verbose = verbose
+    print("\nServing queries on http://%s:%d/ (Ctrl+C to stop)" % (host, port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping server.")
+    finally:
+        server.server_close()
@@ -0,0 +1,241 @@
+"""Set-algebra queries over an imported PartGroup (where-used.py "query" mode).
+
+An expression combines part sets w/ operators, evaluated left to right
+(parentheses group), e.g.
+    union(fa1.txt) - union(fa2.txt) & platform(666111)
+Operands:
+    union(X)        X plus every part used in any level below X (union BOM)
+    where_used(X)   X plus every part above X in the hierarchy
+    platform(P/N)   every part used on the platform (its union BOM)
+    parts(X)        just the parts in X
+X is either a target list file (path, or name of file in import folder) or
+one or more P/Ns separated by commas.
+Operators:
+    |  or  +        union
+    &               intersection
+    -               difference
+Each operand is evaluated once (repeats are reused) and converted to an int
+bitset over the group's parts, so combining sets is just bitwise arithmetic.
+"""
+import os
+import re
+
+import class_def
+from class_def import np
+
+OPERAND_TYPES = ["union", "where_used", "platform", "parts"]
+
+# One token per match: operand w/ its argument, operator, or parenthesis.
+TOKEN_PATTERN = re.compile(r"\s*(?:(\w+)\s*\(\s*([^()]*?)\s*\)|([|+&\-])|([()]))")
+
+
+def tokenize_query(query_str):
+    """Split query expression into list of tokens. Operands are
+    (operand type, argument) tuples; operators and parentheses are strings.
+    """
+    tokens = []
+    position = 0
+    query_str = query_str.rstrip()
+    while position < len(query_str):
+        match = TOKEN_PATTERN.match(query_str, position)
+        if not match:
+            raise ValueError("Can't parse query at position %d: %r"
+                                        % (position, query_str[position:]))
+        operand_type, operand_arg, operator, paren = match.groups()
+        if operand_type:
+            if operand_type.lower() not in OPERAND_TYPES:
+                raise ValueError("Unrecognized operand type: %r (expected one "
+                        "of %s)" % (operand_type, ", ".join(OPERAND_TYPES)))
+            if not operand_arg:
+                raise ValueError("No argument given to %s()" % operand_type)
+            tokens.append((operand_type.lower(), operand_arg))
+        else:
+            tokens.append(operator or paren)
+        position = match.end()
+    return tokens
+
+
+def parse_query(query_str):
+    """Parse query expression into a tree of nested tuples. Each node is either
+    an operand tuple (operand type, argument) or (operator, left, right).
+    """
+    tokens = tokenize_query(query_str)
+    tree, position = parse_expression(tokens, 0)
+    if position != len(tokens):
+        raise ValueError("Unexpected %r in query." % (tokens[position],))
+    return tree
+
+
+def parse_expression(tokens, position):
+    """Parse operands joined by operators (left to right) starting at
+    position. Returns tree and position of first token not used.
+    """
+    tree, position = parse_term(tokens, position)
+    while position < len(tokens) and tokens[position] in ["|", "+", "&", "-"]:
+        operator = tokens[position]
+        right_tree, position = parse_term(tokens, position+1)
+        tree = (operator, tree, right_tree)
+    return tree, position
+
+
+def parse_term(tokens, position):
+    """Parse a single operand or parenthesized expression.
+    """
+    if position >= len(tokens):
+        raise ValueError("Query ends where an operand was expected.")
+    token = tokens[position]
+    if isinstance(token, tuple):
+        return token, position+1
+    if token == "(":
+        tree, position = parse_expression(tokens, position+1)
+        if position >= len(tokens) or tokens[position] != ")":
+            raise ValueError("Missing closing parenthesis in query.")
+        return tree, position+1
+    raise ValueError("Expected an operand, found %r." % token)
+
+
+def check_query(query_str):
+    """Parse query expression and check that every target list file it names
+    can be found, so mistakes show up before reports are imported. Returns
+    parsed tree. Raises ValueError like parse_query().
+    """
+    tree = parse_query(query_str)
+    for operand_type, operand_arg in iter_operands(tree):
+        find_target_file(operand_arg)
+    return tree
+
+
+def iter_operands(tree):
+    """Generator that yields every operand tuple in parsed query tree.
+    """
+    if tree[0] not in ["|", "+", "&", "-"]:
+        yield tree
+        return
+    for sub_tree in tree[1:]:
+        yield from iter_operands(sub_tree)
+
+
+def find_target_file(operand_arg):
+    """Return path of target list file named by operand argument (path, or
+    name of file in import folder), or None if argument is a list of P/Ns.
+    Raises ValueError if it looks like a filename but the file can't be found.
+    """
+    if os.path.exists(operand_arg):
+        return operand_arg
+    elif os.path.exists(os.path.join(class_def.IMPORT_DIR, operand_arg)):
+        return os.path.join(class_def.IMPORT_DIR, operand_arg)
+    elif os.path.splitext(operand_arg)[1]:
+        raise ValueError("Can't find target list file %s" % operand_arg)
+    return None
+
+
+class PartSetQuery(object):
+    """Evaluates set-algebra query expressions against an imported PartGroup
+    (or CompactPartGroup). Operand results are cached, so several queries can
+    share them.
+    """
+    def __init__(self, PartsGr):
+        self.PartsGr = PartsGr
+        # Every part in group gets a bit number. Compact groups already number
+        # their parts (node IDs).
+        if isinstance(PartsGr, class_def.CompactPartGroup):
+            self.Parts_list = None
+        else:
+            self.Parts_list = sorted(PartsGr.get_parts())
+            self.bit_nums = {Part_i.get_pn(): bit_num
+                                for bit_num, Part_i in enumerate(self.Parts_list)}
+        self.part_count = PartsGr.get_part_count()
+        self.operand_cache = {}     # operand tuple -> bitset
+        self.missing_pns = set()    # P/Ns named in operands but not in group
+
+    def get_bit_num(self, Part_i):
+        if self.Parts_list is None:
+            return Part_i.node_id
+        return self.bit_nums[Part_i.get_pn()]
+
+    def get_part_by_bit(self, bit_num):
+        if self.Parts_list is None:
+            return self.PartsGr.get_part_by_id(bit_num)
+        return self.Parts_list[bit_num]
+
+    def to_bits(self, Parts_set):
+        """Convert set of parts to int bitset.
+        """
+        bit_mask = np.zeros(self.part_count, dtype=bool)
+        bit_mask[[self.get_bit_num(Part_i) for Part_i in Parts_set]] = True
+        return int.from_bytes(np.packbits(bit_mask, bitorder="little").tobytes(),
+                                                                    "little")
+
+    def from_bits(self, bits):
+        """Convert int bitset back to set of parts.
+        """
+        byte_count = (self.part_count + 7) // 8
+        bit_mask = np.unpackbits(np.frombuffer(bits.to_bytes(byte_count,
+                    "little"), dtype=np.uint8), count=self.part_count,
+                                                            bitorder="little")
+        return set(map(self.get_part_by_bit, np.flatnonzero(bit_mask).tolist()))
+
+    def get_operand_parts(self, operand_arg):
+        """Return set of parts named by operand argument (target list file or
+        comma-separated P/Ns). P/Ns not in group are recorded in missing_pns.
+        """
+        target_path = find_target_file(operand_arg)
+        if target_path:
+            part_nums = [target_pn for target_pn, target_desc
+                                in class_def.read_target_file(target_path)]
+        else:
+            part_nums = [part_num.strip().upper()
+                                for part_num in operand_arg.split(",")]
+
+        Parts_set = set()
+        for part_num in part_nums:
+            Part_i = self.PartsGr.get_part(part_num)
+            if Part_i:
+                Parts_set.add(Part_i)
+            else:
+                self.missing_pns.add(part_num)
+        return Parts_set
+
+    def get_operand_bits(self, operand):
+        """Return bitset of parts for one operand, evaluating it only the first
+        time it's seen.
+        """
+        bits = self.operand_cache.get(operand)
+        if bits is not None:
+            return bits
+
+        operand_type, operand_arg = operand
+        Parts_set = self.get_operand_parts(operand_arg)
+        if operand_type == "union":
+            Parts_set.update(self.PartsGr.get_descendants(Parts_set))
+        elif operand_type == "where_used":
+            for Part_i in list(Parts_set):
+                Parts_set.update(self.PartsGr.get_ancestors(Part_i))
+        elif operand_type == "platform":
+            for Part_i in Parts_set:
+                if not Part_i.is_platform():
+                    raise ValueError("%s is not a platform." % Part_i)
+            Parts_set.update(self.PartsGr.get_descendants(Parts_set))
+
+        bits = self.to_bits(Parts_set)
+        self.operand_cache[operand] = bits
+        return bits
+
+    def evaluate_tree(self, tree):
+        if tree[0] not in ["|", "+", "&", "-"]:
+            return self.get_operand_bits(tree)
+        operator, left_tree, right_tree = tree
+        left_bits = self.evaluate_tree(left_tree)
+        right_bits = self.evaluate_tree(right_tree)
+        if operator == "&":
+            return left_bits & right_bits
+        elif operator == "-":
+            return left_bits & ~right_bits
+        else:
+            return left_bits | right_bits
+
+    def run_query(self, query_str):
+        """Evaluate query expression and return resulting set of parts.
+        Raises ValueError for a malformed query.
+        """
+        return self.from_bits(self.evaluate_tree(parse_query(query_str)))
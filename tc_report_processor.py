@@ -1,4 +1,3 @@
-print("Importing modules...")
 import os
 import math
 from datetime import datetime
@@ -8,9 +7,10 @@ import re
 import string
 from colorama import Fore, Style
 
-import pandas as pd
-import numpy as np
-print("...done\n")
+from lazy_import import LazyModule
+# Heavy modules are only imported by the code paths that use them.
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
 
 # dir path where this script is stored
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -1,8 +1,14 @@
+import time
+START_TIME = time.perf_counter()    # Used for import-timing report (-it flag)
 import os
+import atexit
 import argparse     # Used to parse optional command-line arguments
 from colorama import Fore, Style
 
 import class_def
+import query_server
+import set_query
+import lazy_import
 from platforms import platform_dict
 
 # dir path where this script is stored
@@ -15,7 +21,8 @@ parser = argparse.ArgumentParser(description="Program to automate recursive "
 parser.add_argument("-v", "--verbose", help="Include additional output for "
                                             "diagnosis.", action="store_true")
 parser.add_argument("-m", "--mode", help="Specify which mode to run program in "
-                    "('single', 'multi', 'union', 'union_diff', 'platform'). "
+                    "('single', 'multi', 'union', 'union_diff', 'platform', "
+                    "'serve', etc.). "
                     "'union' and 'platform' types use SAP multi-level BOM(s)",
                                                         type=str, default=None)
 parser.add_argument("-gp", "--printout", help="Specify that graph should be "
@@ -24,6 +31,32 @@ parser.add_argument("-gp", "--printout", help="Specify that graph should be "
 parser.add_argument("-gc", "--compact", help="Specify that graph should be "
                 "created with compact nodes (part descriptions omitted). "
                 "Only valid in 'single' or 'multi' modes.", action="store_true")
+parser.add_argument("-gf", "--graph-format", help="Output format for graph "
+                "('png', 'svg', 'pdf', or 'dot' for Graphviz source only; "
+                "'json' for parts and parent links, or 'html' for a page "
+                "that opens offline in a browser and expands parents on "
+                "click). "
+                "Only valid in 'single', 'multi' or 'bom_vis' modes.",
+                        type=str, default="png", choices=class_def.GRAPH_FORMATS)
+parser.add_argument("-gs", "--graph-split", help="Draw a separate graph per "
+                "'target' part (single/multi modes) or per 'platform' "
+                "(single/multi/bom_vis modes) instead of one combined graph. "
+                "Graphs are rendered concurrently and listed in an index file.",
+                        type=str, default=None, choices=["target", "platform"])
+parser.add_argument("-gt", "--graph-timeout", help="Seconds to let Graphviz "
+                "lay out each graph w/ -gs flag before giving up on it.",
+                                                        type=float, default=600)
+parser.add_argument("-gd", "--graph-depth", help="Collapse parents more than "
+                "this many levels above starting parts into summary nodes.",
+                                                        type=int, default=None)
+parser.add_argument("-gw", "--graph-fanout", help="Collapse a part's parents "
+                "past this many into a summary node.", type=int, default=None)
+parser.add_argument("-gb", "--graph-budget", help="Max nodes per graph. "
+                "Parts that don't fit are collapsed into summary nodes.",
+                                                        type=int, default=None)
+parser.add_argument("-gl", "--graph-sfdp", help="Lay out graphs w/ more than "
+                "this many nodes w/ sfdp instead of dot (much faster, less "
+                "tidy).", type=int, default=None)
 parser.add_argument("-t", "--target-part", help="Pass in single target part "
                         "to use in place of target_parts.txt contents.",
                                                         type=str, default=None)
@@ -36,16 +69,111 @@ parser.add_argument("-l", "--local", help="Specify to use local SAP exports "
                                    "instead of pulling from network drive "
                                    "(for any features that use SAP_multi_BOM).",
                                                             action="store_true")
+parser.add_argument("-cc", "--compact-core", help="Store imported BOM structure "
+                "in compact array-backed form to cut memory use on large imports. "
+                "Only valid in modes that use SAP multi-level reports.",
+                                                            action="store_true")
+parser.add_argument("-j", "--jobs", help="Number of worker processes to use "
+                        "parsing report files, and number of graphs to render "
+                        "at once w/ -gs flag (0 to use all CPU cores).",
+                                                            type=int, default=1)
+parser.add_argument("-nc", "--no-cache", help="Re-parse every report file "
+                    "and re-run every graph layout instead of reusing cached "
+                    "results from previous runs.",
+                                                            action="store_true")
+parser.add_argument("-ws", "--warm-start", help="Reuse the part structure "
+                "saved by a previous run if the remote CS11 exports' "
+                "effectivity date still matches (saves it otherwise). "
+                "Only valid in modes that use remote SAP multi-level BOMs.",
+                                                            action="store_true")
+parser.add_argument("-sx", "--stream-xlsx", help="Read .xlsx reports row by "
+                "row in read-only mode instead of loading whole workbook "
+                "(less memory and faster on large exports).", action="store_true")
+parser.add_argument("-pt", "--per-target", help="Write a separate union BOM "
+                "file for each target part. Only valid in 'union_batch' mode.",
+                                                            action="store_true")
+parser.add_argument("-p", "--port", help="Port for 'serve' mode to listen on "
+                    "(localhost only).", type=int, default=query_server.DEFAULT_PORT)
+parser.add_argument("-q", "--query", help="Set-algebra expression to "
+                "evaluate in 'query' mode, e.g. \"union(fa1.txt) - "
+                "union(fa2.txt) & platform(666111)\". See set_query.py.",
+                                                        type=str, default=None)
+parser.add_argument("-of", "--output-format", help="File format for "
+                "exported parts lists: 'csv', or 'parquet'/'feather' for a "
+                "typed columnar file (P/N, description, obs flag, platform "
+                "list) that loads straight into pandas. Only valid in modes "
+                "that export a parts list (union, union_diff, platform, "
+                "platform_union, union_loop, query).", type=str, default="csv",
+                                    choices=class_def.PARTS_EXPORT_FORMATS)
+parser.add_argument("-it", "--import-times", help="Print how long startup "
+                "took and how long each module loaded on demand (pandas, "
+                "NumPy, etc.) took to import.", action="store_true")
 # https://www.programcreek.com/python/example/748/argparse.ArgumentParser
 args = parser.parse_args()
 
 assert args.mode, "Need to pass mode argument."
 assert args.mode in ["single", "multi", "union", "union_diff", "platform",
-                        "platform_union", "assy_list", "union_loop", "bom_vis"]
+                "platform_union", "assy_list", "union_loop", "union_batch",
+                                                "bom_vis", "serve", "query"]
+if args.graph_format != "png":
+    assert args.mode in ["single", "multi", "bom_vis"], ("-gf flag can only "
+                                "be used with single, multi or bom_vis modes.")
+if args.graph_split == "target":
+    assert args.mode in ["single", "multi"], ("-gs target can only be used "
+                                                "with single or multi modes.")
+elif args.graph_split == "platform":
+    assert args.mode in ["single", "multi", "bom_vis"], ("-gs platform can "
+                        "only be used with single, multi or bom_vis modes.")
+# Level-of-detail limits for graphs (see class_def.TreeGraph).
+lod_kwargs = {"max_depth": args.graph_depth, "max_fanout": args.graph_fanout,
+        "node_budget": args.graph_budget, "sfdp_threshold": args.graph_sfdp}
+if any(limit is not None for limit in lod_kwargs.values()):
+    assert args.mode in ["single", "multi", "bom_vis"], ("-gd, -gw, -gb and "
+            "-gl flags can only be used with single, multi or bom_vis modes.")
+if args.output_format != "csv":
+    assert args.mode in ["union", "union_diff", "platform", "platform_union",
+                    "union_loop", "query"], ("-of flag can only be used with "
+            "union, union_diff, platform, platform_union, union_loop or query "
+                                                                    "modes.")
 if args.exclude_obs:
     assert args.mode == "multi", "-e flag can only be used with multi mode."
+if args.per_target:
+    assert args.mode == "union_batch", ("-pt flag can only be used with "
+                                                        "union_batch mode.")
+if args.query or args.mode == "query":
+    assert args.query and args.mode == "query", ("-q flag must be used with "
+                                                    "(and only with) query mode.")
+    # Check syntax and target list files before spending time on report
+    # import.
+    try:
+        set_query.check_query(args.query)
+    except ValueError as err:
+        parser.error("invalid -q expression: %s" % err)
+assert args.jobs >= 0, "-j flag must be 0 (all cores) or a positive number."
+if args.jobs == 0:
+    args.jobs = os.cpu_count()
+if args.warm_start:
+    assert args.mode in ["union", "union_diff", "platform", "platform_union",
+                    "union_loop", "union_batch", "bom_vis", "serve",
+                                        "query"] and not args.local, (
+                "-ws flag can only be used with modes that use remote SAP "
+                                                        "multi-level BOMs.")
+    snapshot_path = class_def.SNAPSHOT_PATH
+else:
+    snapshot_path = None
 
-AllParts = class_def.PartGroup()
+if args.compact_core:
+    assert args.mode in ["multi", "union", "union_diff", "platform",
+                "platform_union", "assy_list", "union_loop", "union_batch",
+                                    "bom_vis", "serve", "query"], ("-cc "
+                "flag can only be used with modes that use multi-level reports.")
+    AllParts = class_def.CompactPartGroup(import_workers=args.jobs,
+                report_cache=not args.no_cache, snapshot_path=snapshot_path,
+                                                stream_xlsx=args.stream_xlsx)
+else:
+    AllParts = class_def.PartGroup(import_workers=args.jobs,
+                report_cache=not args.no_cache, snapshot_path=snapshot_path,
+                                                stream_xlsx=args.stream_xlsx)
 AllParts.import_platforms(platform_dict)
 
 if args.target_all or args.target_part:
@@ -63,6 +191,11 @@ if args.target_all or args.target_part:
             for Platform in AllParts.get_platforms():
                 target_parts_file.write(str(Platform) + "\n")
 
+if args.import_times:
+    # Report printed when program exits, after mode has loaded what it needs.
+    atexit.register(lazy_import.print_import_times,
+                                    startup_time=time.perf_counter()-START_TIME)
+
 
 if args.mode.lower() == "single":
     """Reads in TC-SAP single-level where-used report(s), builds structure from
@@ -73,9 +206,19 @@ if args.mode.lower() == "single":
     AllParts.import_all_reports(report_type="SAPTC")
     # AllParts.get_target_obs_status()
     # AllParts.print_obs_status_trace()
-    TreeViz = class_def.TreeGraph(AllParts, target_group_only=True,
-                            printout=args.printout, exclude_desc=args.compact)
-    TreeViz.export_graph()
+    if args.graph_split:
+        class_def.export_tree_graphs(class_def.split_tree_graphs(AllParts,
+                        split_by=args.graph_split, target_group_only=True,
+                        printout=args.printout, exclude_desc=args.compact,
+                                                                **lod_kwargs),
+                    graph_format=args.graph_format, workers=args.jobs,
+                    timeout=args.graph_timeout, use_cache=not args.no_cache)
+    else:
+        TreeViz = class_def.TreeGraph(AllParts, target_group_only=True,
+                            printout=args.printout, exclude_desc=args.compact,
+                                                                **lod_kwargs)
+        TreeViz.export_graph(graph_format=args.graph_format,
+                                                use_cache=not args.no_cache)
 
 elif args.mode.lower() == "multi":
     """Reads in SAP multi-level where-used report(s), reads in target parts.
@@ -85,10 +228,19 @@ elif args.mode.lower() == "multi":
     AllParts.import_all_reports(report_type="SAP_multi_w")
     # AllParts.export_parts_set(omit_platforms=True) # Export just the de-duplicated parts list. Esp. useful if SAP reports are actually one-level
 
-    TreeViz = class_def.TreeGraph(AllParts, target_group_only=True,
+    if args.graph_split:
+        class_def.export_tree_graphs(class_def.split_tree_graphs(AllParts,
+                        split_by=args.graph_split, target_group_only=True,
+                        printout=args.printout, exclude_desc=args.compact,
+                            exclude_obs=args.exclude_obs, **lod_kwargs),
+                    graph_format=args.graph_format, workers=args.jobs,
+                    timeout=args.graph_timeout, use_cache=not args.no_cache)
+    else:
+        TreeViz = class_def.TreeGraph(AllParts, target_group_only=True,
                             printout=args.printout, exclude_desc=args.compact,
-                                                exclude_obs=args.exclude_obs)
-    TreeViz.export_graph()
+                            exclude_obs=args.exclude_obs, **lod_kwargs)
+        TreeViz.export_graph(graph_format=args.graph_format,
+                                                use_cache=not args.no_cache)
 
 elif args.mode.lower() == "union":
     """Reads in SAP multi-level BOM(s), reads in target parts.
@@ -111,7 +263,8 @@ elif args.mode.lower() == "union":
     # obs_parts = AllParts.get_target_parts()
     # print(new_parts.intersection(obs_parts))
     #### TEMP
-    AllParts.export_parts_set(pn_set=AllParts.get_union_bom(), omit_platforms=True)
+    AllParts.export_parts_set(pn_set=AllParts.get_union_bom(), omit_platforms=True,
+                                            export_format=args.output_format)
 
 elif args.mode.lower() == "union_diff":
     """Reads in SAP multi-level BOM(s), reads in target parts.
@@ -122,6 +275,8 @@ elif args.mode.lower() == "union_diff":
     Subtracts this second union set from first union set to show all parts in
     first union set that don't also exist in second union set.
     Exports this difference list.
+    ('query' mode does the same w/o prompting, e.g.
+    -q "union(fa1.txt) - union(fa2.txt)")
     Program will report any target parts not found in multi-BOMs (and thus not
     expanded).
     """
@@ -141,7 +296,8 @@ elif args.mode.lower() == "union_diff":
 
     input("\n\nReplace target parts")
     subtract_Parts = AllParts.get_union_bom() # re-imports target parts. Returns a set.
-    AllParts.export_parts_set(pn_set=main_Parts.difference(subtract_Parts), omit_platforms=True)
+    AllParts.export_parts_set(pn_set=main_Parts.difference(subtract_Parts), omit_platforms=True,
+                                            export_format=args.output_format)
 
 elif args.mode.lower() == "platform":
     """Reads in SAP multi-level BOM(s), reads in target parts.
@@ -159,7 +315,8 @@ elif args.mode.lower() == "platform":
     AllParts.import_target_parts()
 
     AllParts.export_parts_set(pn_set=AllParts.get_target_parts(),
-                                        omit_platforms=True, platform_app=True)
+                                        omit_platforms=True, platform_app=True,
+                                        export_format=args.output_format)
 
 elif args.mode.lower() == "platform_union":
     """Reads in SAP multi-level BOM(s), reads in target parts.
@@ -182,7 +339,8 @@ elif args.mode.lower() == "platform_union":
 
     # Export union bom w/ platform applications:
     AllParts.export_parts_set(pn_set=AllParts.get_union_bom(),
-                                        omit_platforms=True, platform_app=True)
+                                        omit_platforms=True, platform_app=True,
+                                        export_format=args.output_format)
 
 elif args.mode.lower() == "assy_list":
     """Reads in SAP multi-level where-used report(s), reads in target parts.
@@ -192,8 +350,8 @@ elif args.mode.lower() == "assy_list":
 
     print("")
     for TargetPart in AllParts.get_target_parts():
-        assy_set = TargetPart.get_parents_above(assy_only=True)
-        # assy_set = TargetPart.get_parents_above()
+        assy_set = AllParts.get_parents_above(TargetPart, assy_only=True)
+        # assy_set = AllParts.get_parents_above(TargetPart)
         print("%s: " % TargetPart)
         for Part_i in assy_set:
             print("\t%s - %s" % (Part_i, Part_i.get_name()))
@@ -219,7 +377,38 @@ elif args.mode.lower() == "union_loop":
         else:
             # Manually edit target_Parts so get_union_bom() ignores txt file.
             AllParts.target_Parts = set({AllParts.get_part(pn)})
-            AllParts.export_parts_set(pn_set=AllParts.get_union_bom(), omit_platforms=True)
+            AllParts.export_parts_set(pn_set=AllParts.get_union_bom(), omit_platforms=True,
+                                                export_format=args.output_format)
+
+elif args.mode.lower() == "union_batch":
+    """Reads in SAP multi-level BOM(s), reads in target parts.
+    Exports union BOM (target part and every part used in any level below it)
+    of each target part separately, all in one long-format file (or one file
+    per target part w/ -pt flag). Assemblies shared between target parts are
+    only walked once.
+    Target parts not found in multi-BOMs are reported and skipped.
+    """
+    if args.local:
+        AllParts.import_all_reports(report_type="SAP_multi_BOM_xlsx")
+    else:
+        AllParts.import_all_reports(report_type="SAP_multi_BOM_text")
+
+    AllParts.import_target_parts(parts_update=False)
+    batch_Parts = set()
+    missing_pns = []
+    for TargetPart in AllParts.get_target_parts():
+        if AllParts.get_part(TargetPart.get_pn()):
+            batch_Parts.add(AllParts.get_part(TargetPart.get_pn()))
+        else:
+            missing_pns.append(TargetPart.get_pn())
+    if missing_pns:
+        print("\n%d of %d target parts not found in report(s) (skipping):"
+                % (len(missing_pns), len(AllParts.get_target_parts())))
+        for pn in sorted(missing_pns):
+            print("\t%s" % pn)
+
+    AllParts.export_union_boms(AllParts.get_union_boms(batch_Parts),
+                                                    per_target=args.per_target)
 
 elif args.mode.lower() == "bom_vis":
     """Reads in SAP multi-level BOM(s), reads in target parts.
@@ -234,6 +423,55 @@ elif args.mode.lower() == "bom_vis":
 
     # AllParts.import_target_parts()
 
-    TreeViz = class_def.TreeGraph(AllParts, target_group_only=False,
-                            printout=args.printout, exclude_desc=args.compact)
-    TreeViz.export_graph()
+    if args.graph_split:
+        class_def.export_tree_graphs(class_def.split_tree_graphs(AllParts,
+                        split_by=args.graph_split, target_group_only=False,
+                        printout=args.printout, exclude_desc=args.compact,
+                                                                **lod_kwargs),
+                    graph_format=args.graph_format, workers=args.jobs,
+                    timeout=args.graph_timeout, use_cache=not args.no_cache)
+    else:
+        TreeViz = class_def.TreeGraph(AllParts, target_group_only=False,
+                            printout=args.printout, exclude_desc=args.compact,
+                                                                **lod_kwargs)
+        TreeViz.export_graph(graph_format=args.graph_format,
+                                                use_cache=not args.no_cache)
+
+elif args.mode.lower() == "serve":
+    """Reads in SAP multi-level BOM(s) once, then answers union, platform,
+    where-used, assy_list and can-obs queries over HTTP (JSON) until stopped.
+    See query_server.py for query format.
+    """
+    if args.local:
+        AllParts.import_all_reports(report_type="SAP_multi_BOM_xlsx")
+    else:
+        AllParts.import_all_reports(report_type="SAP_multi_BOM_text")
+
+    query_server.serve(AllParts, port=args.port, verbose=args.verbose)
+
+elif args.mode.lower() == "query":
+    """Reads in SAP multi-level BOM(s), then evaluates set-algebra expression
+    passed w/ -q flag, combining union BOMs, where-used sets and platform BOMs
+    of target lists (files or P/Ns). See set_query.py for syntax.
+    Exports resulting parts list.
+    """
+    if args.local:
+        AllParts.import_all_reports(report_type="SAP_multi_BOM_xlsx")
+    else:
+        AllParts.import_all_reports(report_type="SAP_multi_BOM_text")
+
+    PartsQuery = set_query.PartSetQuery(AllParts)
+    print("\nEvaluating query: %s" % args.query)
+    try:
+        result_Parts = PartsQuery.run_query(args.query)
+    except ValueError as err:
+        # e.g. platform() given a P/N that isn't a platform.
+        parser.exit(1, "\nQuery failed: %s\n" % err)
+    if PartsQuery.missing_pns:
+        print("\n%d P/Ns in query not found in report(s) (omitted):"
+                                                % len(PartsQuery.missing_pns))
+        for pn in sorted(PartsQuery.missing_pns):
+            print("\t%s" % pn)
+    print("\n%d parts in result." % len(result_Parts))
+    AllParts.export_parts_set(pn_set=result_Parts, omit_platforms=True,
+                                            export_format=args.output_format)